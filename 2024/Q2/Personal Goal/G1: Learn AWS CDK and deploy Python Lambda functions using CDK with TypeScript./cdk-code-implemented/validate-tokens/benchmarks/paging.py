@@ -0,0 +1,136 @@
+"""
+Benchmark of paging through /api/v2/user/fcm-users against a local HTTP stub.
+
+The stub answers every page after --latency-ms and counts the connections
+it accepts; each page is "processed" for --work-ms by the client. Compared:
+
+- requests.get per page, like UserService did before it shared a session
+- the shared session, one page after another
+- the shared session with UserService.iter_fcm_token_pages, which fetches
+  the next page while the current one is processed
+
+Usage (from the validate-tokens directory, with the handler's requirements installed):
+
+    python benchmarks/paging.py --pages 1000 --page-size 100 --latency-ms 5 --work-ms 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'handler'))
+
+import requests  # noqa: E402
+
+
+class StubAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pages, page_size, latency):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.pages = pages
+        self.page_size = page_size
+        self.latency = latency
+        self.connections = 0
+        self.base_url = f'http://127.0.0.1:{self.server_address[1]}'
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body go out in separate writes, don't let them wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, data):
+        content = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.reply(201, {'jwt': 'stub'})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        page = int(parse_qs(url.query).get('page', ['0'])[0])
+        time.sleep(self.server.latency)
+        start = page * self.server.page_size
+        users = [
+            {'id': i, 'token': f'token-{i}', 'user_id': i // 2, 'platform': 'android', 'app_name': 'aegix'}
+            for i in range(start, start + self.server.page_size)
+        ]
+        next_url = f'{self.server.base_url}{url.path}?page={page + 1}' if page + 1 < self.server.pages else None
+        self.reply(200, {'fcm_user_list': users, 'next': next_url})
+
+
+def legacy_pages(user_service):
+    """Paging as UserService.get_fcm_tokens did it before, with a new connection per page."""
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"JWT {user_service.authentication_token}"
+    }
+    users_url = f"{user_service.base_url}/api/v2/user/fcm-users"
+    while users_url:
+        data = json.loads(requests.get(users_url, headers=headers).text)
+        users_url = data.get('next')
+        yield data.get('fcm_user_list')
+
+
+def session_pages(user_service):
+    users_url = f"{user_service.base_url}/api/v2/user/fcm-users"
+    while users_url:
+        users, users_url = user_service.get_fcm_tokens_page(users_url)
+        yield users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=5)
+    parser.add_argument('--work-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    stub = StubAPI(args.pages, args.page_size, args.latency_ms / 1000)
+    os.environ.update(BASE_API_URL=stub.base_url, USER_EMAIL='benchmark', USER_PASSWORD='benchmark')
+    import userService
+
+    runs = [
+        ('requests.get per page', legacy_pages),
+        ('shared session', session_pages),
+        ('shared session + prefetch', userService.UserService.iter_fcm_token_pages),
+    ]
+    print(f'{args.pages} pages of {args.page_size} users, {args.latency_ms} ms latency, {args.work_ms} ms work per page\n')
+    print('| paging | seconds | pages/s | connections |')
+    print('|---|---:|---:|---:|')
+    for name, pages in runs:
+        stub.connections = 0
+        userService.http_session = None
+        user_service = userService.UserService().authenticate()
+        start = time.perf_counter()
+        count = 0
+        for users in pages(user_service):
+            count += len(users)
+            time.sleep(args.work_ms / 1000)
+        elapsed = time.perf_counter() - start
+        assert count == args.pages * args.page_size
+        print(f'| {name} | {elapsed:.2f} | {args.pages / elapsed:.0f} | {stub.connections} |')
+
+
+if __name__ == '__main__':
+    main()
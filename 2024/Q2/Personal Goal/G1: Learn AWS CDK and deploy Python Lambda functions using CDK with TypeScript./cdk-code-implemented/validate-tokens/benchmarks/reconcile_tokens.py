@@ -0,0 +1,141 @@
+"""
+Benchmark of the token reconciliation in the validate-tokens handler.
+
+Builds synthetic users (a few tokens per user, on one or two platforms, with
+about a tenth of the tokens failing) and times TokenReconciler for
+growing sizes. The previous list based version is timed on the smaller
+sizes only, since it is quadratic, and both results are compared.
+The synthetic input is moved out of the garbage collector's reach (gc.freeze)
+so that collections scanning it don't hide the reconciliation's own cost.
+
+Usage (from the validate-tokens directory, with the handler's requirements installed):
+
+    python benchmarks/reconcile_tokens.py --sizes 10000 50000 100000 500000
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'handler'))
+
+from userService import TokenReconciler  # noqa: E402
+
+PLATFORMS = ['android', 'ios']
+
+
+def synthetic_tokens(size, failure_rate=0.1, seed=1):
+    rnd = random.Random(seed)
+    fcm_user_tokens = []
+    success_tokens = set()
+    user_id = 0
+    while len(fcm_user_tokens) < size:
+        user_id += 1
+        for i in range(rnd.randint(1, 4)):
+            token = f'token-{user_id}-{i}'
+            fcm_user_tokens.append({
+                'id': len(fcm_user_tokens) + 1,
+                'token': token,
+                'user_id': user_id,
+                'platform': rnd.choice(PLATFORMS),
+                'full_name': f'User {user_id}',
+                'email': f'user{user_id}@example.com',
+            })
+            if rnd.random() >= failure_rate:
+                success_tokens.add(token)
+    return fcm_user_tokens[:size], success_tokens
+
+
+def save_unique_platform_in_user_dict(data_list, platform, user_id):
+    """UserService.save_unique_platform_in_user_dict before it was removed."""
+    if not data_list.get(user_id, []):
+        data_list[user_id] = []
+    if platform not in data_list[user_id]:
+        data_list[user_id].append(platform)
+
+
+def get_failed_users_from_failed_tokens(failed_users, failed_user_id_dict_with_failed_platform):
+    """UserService.get_failed_users_from_failed_tokens before it was removed."""
+    existing_used_details = {}
+    failed_user_details = []
+    for user in failed_users:
+        user_id = user.get('user_id')
+        user_failed_platform = failed_user_id_dict_with_failed_platform.get(user_id, [])
+        if user.get('platform') in user_failed_platform:
+            if user_id not in existing_used_details:
+                existing_used_details[user_id] = []
+            if user.get('platform') not in existing_used_details[user_id]:
+                failed_user_details.append({**user})
+                existing_used_details[user_id].append(user.get('platform'))
+    return failed_user_details
+
+
+def legacy_reconcile_tokens(fcm_user_tokens, success_tokens):
+    """The handler's reconciliation before it was indexed by token and platform."""
+    success_tokens = list(success_tokens)
+    failed_fcm_tokens_list = []
+    failed_fcm_user_lists = []
+    failed_user_id_dict_with_failed_platform = {}
+    success_fcm_ids = []
+    success_user_id_dict_with_success_platform = {}
+    for fcm_user_token in fcm_user_tokens:
+        user_id = fcm_user_token.get('user_id')
+        if fcm_user_token.get('token') in success_tokens:
+            save_unique_platform_in_user_dict(success_user_id_dict_with_success_platform,
+                                              fcm_user_token.get('platform'), user_id)
+            success_fcm_ids.append(fcm_user_token.get('token'))
+    for fcm_user_token in fcm_user_tokens:
+        user_id = fcm_user_token.get('user_id')
+        if fcm_user_token.get('platform') not in success_user_id_dict_with_success_platform.get(user_id, []):
+            failed_fcm_tokens_list.append(fcm_user_token.get('token'))
+            failed_fcm_user_lists.append(fcm_user_token)
+            save_unique_platform_in_user_dict(failed_user_id_dict_with_failed_platform,
+                                              fcm_user_token.get('platform'), user_id)
+    failed_users = get_failed_users_from_failed_tokens(failed_fcm_user_lists, failed_user_id_dict_with_failed_platform)
+    return success_fcm_ids, failed_fcm_tokens_list, failed_users
+
+
+def reconcile_tokens(fcm_user_tokens, success_tokens):
+    reconciler = TokenReconciler()
+    success_fcm_ids = reconciler.add(fcm_user_tokens, success_tokens)
+    return (success_fcm_ids, *reconciler.failed())
+
+
+def timed(func, *args):
+    gc.collect()
+    gc.freeze()
+    try:
+        start = time.perf_counter()
+        result = func(*args)
+        return time.perf_counter() - start, result
+    finally:
+        gc.unfreeze()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000, 500000])
+    parser.add_argument('--legacy-max', type=int, default=20000,
+                        help='largest size to run the previous implementation on')
+    args = parser.parse_args()
+
+    print('| tokens | TokenReconciler ms | per token us | previous ms |')
+    print('|---:|---:|---:|---:|')
+    for size in args.sizes:
+        fcm_user_tokens, success_tokens = synthetic_tokens(size)
+        elapsed, result = timed(reconcile_tokens, fcm_user_tokens, success_tokens)
+        legacy = '-'
+        if size <= args.legacy_max:
+            legacy_elapsed, legacy_result = timed(legacy_reconcile_tokens, fcm_user_tokens, success_tokens)
+            assert result[0] == legacy_result[0]
+            assert sorted(result[1]) == sorted(legacy_result[1])
+            assert result[2] == legacy_result[2]
+            legacy = f'{legacy_elapsed * 1000:.0f}'
+        print(f'| {size} | {elapsed * 1000:.0f} | {elapsed / size * 1e6:.2f} | {legacy} |')
+
+
+if __name__ == '__main__':
+    main()
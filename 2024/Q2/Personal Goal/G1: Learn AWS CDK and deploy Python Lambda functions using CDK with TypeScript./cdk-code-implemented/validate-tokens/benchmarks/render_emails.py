@@ -0,0 +1,68 @@
+"""
+Benchmark of rendering the "token expired" emails.
+
+Compares str.format on the HTML template plus a MIMEMultipart tree and
+as_string() per receiver, like EmailService did before, with
+EmailService.render_messages, and checks both give the same messages
+(boundaries aside).
+
+Usage (from the validate-tokens directory, with the handler's requirements installed):
+
+    python benchmarks/render_emails.py --emails 100000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'handler'))
+
+import emailService  # noqa: E402
+
+BOUNDARY = re.compile(r'={15}\d+==')
+
+
+def legacy_render_messages(email_service):
+    """Rendering as EmailService.send_email did it before."""
+    logo_image = f'{email_service.base_url}/img/aegix-logo.png'
+    for receiver in email_service.receivers:
+        receiver_email = receiver.get('email')
+        html_content = emailService.html_content_template.format(
+            receiver_full_name=receiver.get('full_name', 'Aegix AIM User'), device=receiver.get('platform'),
+            logo_image=logo_image, base_url=email_service.base_url)
+        yield receiver_email, email_service.build_message(receiver_email, html_content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--emails', type=int, default=100000)
+    args = parser.parse_args()
+
+    os.environ.update(SMTP_SENDER_EMAIL='support@example.com', BASE_URL='example.com')
+    receivers = [{'email': f'user{i}@example.com', 'full_name': f'User {i}', 'platform': ['ios', 'android'][i % 2]}
+                 for i in range(args.emails)]
+    # a few receivers that need encoding
+    receivers[1::1000] = [{'email': 'zoë@example.com', 'full_name': 'Zoë', 'platform': 'ios'}] * len(receivers[1::1000])
+    email_service = emailService.EmailService(receivers=receivers)
+    email_service.base_url = f'https://{email_service.base_url}'
+
+    print(f'{args.emails} emails\n')
+    print('| rendering | seconds | us per email |')
+    print('|---|---:|---:|')
+    results = []
+    for name, render in [('str.format + MIMEMultipart', legacy_render_messages),
+                         ('render_messages', emailService.EmailService.render_messages)]:
+        start = time.perf_counter()
+        messages = list(render(email_service))
+        elapsed = time.perf_counter() - start
+        results.append(messages)
+        print(f'| {name} | {elapsed:.2f} | {elapsed / args.emails * 1e6:.1f} |')
+
+    for legacy, message in zip(*results):
+        assert BOUNDARY.sub('', legacy[1]) == BOUNDARY.sub('', message[1]), (legacy, message)
+
+
+if __name__ == '__main__':
+    main()
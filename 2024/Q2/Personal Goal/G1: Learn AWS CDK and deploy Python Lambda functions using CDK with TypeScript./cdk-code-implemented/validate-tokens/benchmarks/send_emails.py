@@ -0,0 +1,133 @@
+"""
+Benchmark of EmailService against a local SMTP server.
+
+Starts an aiosmtpd server with STARTTLS (self-signed certificate made with
+openssl) and AUTH, answering EHLO and DATA after --latency-ms, and sends
+--emails "token expired" emails:
+
+- with a new connection, STARTTLS and login per email, like EmailService did before
+- with EmailService over 1 and --sessions persistent connections
+
+Usage (from the validate-tokens directory, with aiosmtpd and the handler's requirements installed):
+
+    python benchmarks/send_emails.py --emails 1000 --latency-ms 20 --sessions 3
+"""
+
+import argparse
+import asyncio
+import builtins
+import logging
+import os
+import smtplib
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'handler'))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.smtp import AuthResult  # noqa: E402
+
+
+class Handler:
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+        self.logins = 0
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        self.logins += 1
+        return AuthResult(success=True)
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        await asyncio.sleep(self.latency)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+        return '250 OK'
+
+
+def start_server(latency, directory):
+    certfile = os.path.join(directory, 'cert.pem')
+    keyfile = os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-subj', '/CN=localhost',
+                    '-days', '1', '-keyout', keyfile, '-out', certfile], check=True, capture_output=True)
+    tls_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    tls_context.load_cert_chain(certfile, keyfile)
+    handler = Handler(latency)
+    # the controller can't listen on port 0, pick a free port
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    controller = Controller(handler, hostname='127.0.0.1', port=port, tls_context=tls_context,
+                            require_starttls=True, auth_require_tls=True,
+                            authenticator=handler.authenticate)
+    controller.start()
+    return controller, handler
+
+
+def legacy_send(email_service, messages):
+    """Sending as EmailService.send_email did before, one connection per email."""
+    for receiver_email, message in messages:
+        with smtplib.SMTP(email_service.smtp_server, email_service.smtp_port) as server:
+            server.starttls(context=email_service.ssl_context)
+            server.login(email_service.smtp_username, email_service.smtp_password)
+            server.sendmail(email_service.smtp_sender_email, receiver_email, message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--emails', type=int, default=1000)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--sessions', type=int, default=3)
+    args = parser.parse_args()
+    # aiosmtpd warns about its own use of Session.login_data on every login
+    logging.getLogger('mail.log').setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        controller, handler = start_server(args.latency_ms / 1000, directory)
+        os.environ.update(SMTP_SERVER=controller.hostname, SMTP_PORT=str(controller.port),
+                          SMTP_SENDER_EMAIL='support@example.com', SMTP_USERNAME='user', SMTP_PASSWORD='password',
+                          BASE_URL='example.com')
+        from emailService import EmailService
+
+        ssl_context = ssl._create_unverified_context()
+        receivers = [{'email': f'user{i}@example.com', 'full_name': f'User {i}', 'platform': 'ios'}
+                     for i in range(args.emails)]
+        runs = [
+            ('connection per email', None),
+            ('1 persistent session', 1),
+            (f'{args.sessions} persistent sessions', args.sessions),
+        ]
+        print(f'{args.emails} emails, {args.latency_ms} ms per EHLO and DATA\n')
+        print('| sending | seconds | emails/s | logins |')
+        print('|---|---:|---:|---:|')
+        _print = builtins.print
+        for name, sessions in runs:
+            email_service = EmailService(receivers=receivers, smtp_sessions=sessions, rate_limit=10 ** 6,
+                                         ssl_context=ssl_context)
+            handler.received = handler.logins = 0
+            start = time.perf_counter()
+            builtins.print = lambda *args, **kwargs: None
+            try:
+                if sessions is None:
+                    legacy_send(email_service, [(receiver['email'], 'Subject: expired\r\n\r\nbody')
+                                                for receiver in receivers])
+                else:
+                    email_service.send_email()
+            finally:
+                builtins.print = _print
+            elapsed = time.perf_counter() - start
+            assert handler.received == args.emails, handler.received
+            print(f'| {name} | {elapsed:.2f} | {args.emails / elapsed:.0f} | {handler.logins} |')
+        controller.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,23 @@
 import os
+import queue
+import random
 import smtplib, ssl
+import string
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
+from rateLimit import TokenBucket
 
-class EmailService:
-    """
-     Class for sending emails to multiple recipients.
-    """
+# SMTP connections sending at the same time, and emails per second across them
+default_smtp_sessions = 3
+default_rate_limit = 10
+# errors of a single message, after which the SMTP connection can still be used
+refused_message_errors = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
 
-    def __init__(self, *args, **kwargs):
-        """
-        Sends the email to all recipients.
-        :param kwargs:
-           receivers (list): A list of dictionaries, each containing information about a recipient.
-                Each dictionary should have the following keys:
-                - email (str): The email address of the recipient.
-                - full_name (str): The full name of the recipient.
-        """
-
-        self.smtp_port = os.environ.get('SMTP_PORT', 587)
-        self.smtp_server = os.environ.get('SMTP_SERVER')
-        self.smtp_sender_email = os.environ.get('SMTP_SENDER_EMAIL')
-        self.smtp_username = os.environ.get('SMTP_USERNAME')
-        self.smtp_password = os.environ.get('SMTP_PASSWORD')
-        self.base_url = os.environ.get('BASE_URL')
-        self.receivers = kwargs.get('receivers', [])
-
-    def send_email(self):
-        subject = "Push notification Token has Expired"
-        html_content_template = '''
+subject = "Push notification Token has Expired"
+html_content_template = '''
           <!DOCTYPE html>
               <html lang="en">
               <head>
@@ -105,25 +93,200 @@ class EmailService:
               </html>
                       '''
 
-        context = ssl.create_default_context()
-        self.base_url = f"https://{self.base_url}"
+
+class CompiledTemplate:
+    """
+    A str.format template split once into its static chunks and the positions of its fields,
+    so rendering it only joins strings.
+    """
+
+    def __init__(self, template):
+        self.chunks = []
+        self.fields = []
+        for literal_text, field_name, format_spec, conversion in string.Formatter().parse(template):
+            if literal_text:
+                self.chunks.append(literal_text)
+            if field_name is not None:
+                if format_spec or conversion:
+                    raise ValueError(f"Format spec of field {field_name} is not supported")
+                self.fields.append((len(self.chunks), field_name))
+                self.chunks.append(None)
+
+    def render(self, **kwargs):
+        chunks = self.chunks.copy()
+        for position, field_name in self.fields:
+            chunks[position] = str(kwargs[field_name])
+        return ''.join(chunks)
+
+
+compiled_html_content_template = CompiledTemplate(html_content_template)
+
+
+def is_plain_header(value):
+    return isinstance(value, str) and value.isascii() and '\r' not in value and '\n' not in value
+
+
+class EmailService:
+    """
+     Class for sending emails to multiple recipients.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Sends the email to all recipients.
+        :param kwargs:
+           receivers (list): A list of dictionaries, each containing information about a recipient.
+                Each dictionary should have the following keys:
+                - email (str): The email address of the recipient.
+                - full_name (str): The full name of the recipient.
+           smtp_sessions (int): SMTP connections sending at the same time (optional).
+           rate_limit (int): Emails sent per second (optional).
+           ssl_context (ssl.SSLContext): Context for STARTTLS (optional).
+        """
+
+        self.smtp_port = os.environ.get('SMTP_PORT', 587)
+        self.smtp_server = os.environ.get('SMTP_SERVER')
+        self.smtp_sender_email = os.environ.get('SMTP_SENDER_EMAIL')
+        self.smtp_username = os.environ.get('SMTP_USERNAME')
+        self.smtp_password = os.environ.get('SMTP_PASSWORD')
+        self.base_url = os.environ.get('BASE_URL')
+        self.receivers = kwargs.get('receivers', [])
+        self.smtp_sessions = kwargs.get('smtp_sessions', default_smtp_sessions)
+        self.rate_limit = kwargs.get('rate_limit', default_rate_limit)
+        self.ssl_context = kwargs.get('ssl_context') or ssl.create_default_context()
+
+    def connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        try:
+            server.starttls(context=self.ssl_context)
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def send_messages(self, messages, rate_limiter):
+        """
+        Send messages from the queue over one SMTP connection until the queue is empty.
+        The connection is opened on the first message and reopened when the server drops it.
+        A message refused by the server doesn't stop the connection; any other error closes it,
+        and failing to connect stops this worker with the error.
+        :param messages: queue of (receiver_email, message) tuples
+        :param rate_limiter: TokenBucket shared by the connections
+        :return: list of (receiver_email, error) of the messages that couldn't be sent
+        """
+        failed = []
+        server = None
+        try:
+            while True:
+                try:
+                    receiver_email, message = messages.get_nowait()
+                except queue.Empty:
+                    break
+                rate_limiter.acquire()
+                for attempt in range(2):
+                    if server is None:
+                        try:
+                            server = self.connect()
+                        except Exception:
+                            # give the message back to the workers still connected
+                            messages.put((receiver_email, message))
+                            raise
+                    try:
+                        server.sendmail(self.smtp_sender_email, receiver_email, message)
+                        print(f"Email sent successfully to {receiver_email}")
+                        break
+                    except smtplib.SMTPServerDisconnected as e:
+                        server.close()
+                        server = None
+                        if attempt:
+                            print(f"Error in sending the email to {receiver_email}: {str(e)}")
+                            failed.append((receiver_email, str(e)))
+                    except Exception as e:
+                        print(f"Error in sending the email to {receiver_email}: {str(e)}")
+                        failed.append((receiver_email, str(e)))
+                        # the server refused this message, the connection itself is still fine
+                        if not isinstance(e, refused_message_errors):
+                            server.close()
+                            server = None
+                        break
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except smtplib.SMTPException:
+                    server.close()
+        return failed
+
+    def build_message(self, receiver_email, html_content):
+        """
+        Build the message with the email package, which also encodes non-ASCII headers and content
+        """
+        message = MIMEMultipart()
+        message["From"] = self.smtp_sender_email
+        message["To"] = receiver_email
+        message["Subject"] = subject
+        message.attach(MIMEText(html_content, "html"))
+        return message.as_string()
+
+    def render_messages(self):
+        """
+        Render the message of every receiver.
+        The MIME headers and parts are the ones build_message writes, serialized once;
+        messages that need encoding still go through build_message.
+        :return: generator of (receiver_email, message) tuples
+        """
         logo_image = f'{self.base_url}/img/aegix-logo.png'
+        boundary = f"{'=' * 15}{random.randrange(sys.maxsize):019d}=="
+        plain_sender = is_plain_header(self.smtp_sender_email)
+        head = f'Content-Type: multipart/mixed; boundary="{boundary}"\n' \
+               f'MIME-Version: 1.0\n' \
+               f'From: {self.smtp_sender_email}\n' \
+               f'To: '
+        middle = f'\nSubject: {subject}\n' \
+                 f'\n' \
+                 f'--{boundary}\n' \
+                 f'Content-Type: text/html; charset="us-ascii"\n' \
+                 f'MIME-Version: 1.0\n' \
+                 f'Content-Transfer-Encoding: 7bit\n' \
+                 f'\n'
+        tail = f'\n--{boundary}--\n'
         for receiver in self.receivers:
             receiver_email = receiver.get('email')
             receiver_full_name = receiver.get('full_name', 'Aegix AIM User')
             device = receiver.get('platform')
-            message = MIMEMultipart()
-            message["From"] = self.smtp_sender_email
-            message["To"] = receiver_email
-            message["Subject"] = subject
-            html_content = html_content_template.format(receiver_full_name=receiver_full_name, device=device,
-                                                        logo_image=logo_image, base_url=self.base_url)
-            message.attach(MIMEText(html_content, "html"))
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+            html_content = compiled_html_content_template.render(receiver_full_name=receiver_full_name,
+                                                                 device=device, logo_image=logo_image,
+                                                                 base_url=self.base_url)
+            if plain_sender and is_plain_header(receiver_email) and html_content.isascii() \
+                    and '\r' not in html_content and boundary not in html_content:
+                yield receiver_email, ''.join((head, receiver_email, middle, html_content, tail))
+            else:
+                yield receiver_email, self.build_message(receiver_email, html_content)
+
+    def send_email(self):
+        self.base_url = f"https://{self.base_url}"
+        messages = queue.Queue()
+        for receiver_email, message in self.render_messages():
+            messages.put((receiver_email, message))
+
+        rate_limiter = TokenBucket(self.rate_limit)
+        sessions = max(1, min(self.smtp_sessions, messages.qsize()))
+        failed = []
+        connection_error = None
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            futures = [executor.submit(self.send_messages, messages, rate_limiter) for _ in range(sessions)]
+            for future in futures:
                 try:
-                    server.starttls(context=context)
-                    server.login(self.smtp_username, self.smtp_password)
-                    server.sendmail(self.smtp_sender_email, receiver_email, message.as_string())
-                    print(f"Email sent successfully to {receiver_email}")
+                    failed.extend(future.result())
                 except Exception as e:
-                    print(str(e))
+                    print(f"Error in connecting to the SMTP server: {str(e)}")
+                    connection_error = str(e)
+        # left in the queue when no worker could connect
+        while not messages.empty():
+            receiver_email, _ = messages.get_nowait()
+            failed.append((receiver_email, connection_error))
+
+        if len(failed):
+            return f"Failed to send {len(failed)} of {len(self.receivers)} emails: {failed}"
+        return "Success in sending the emails"
@@ -1,12 +1,19 @@
 import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import boto3
-from botocore.exceptions import ClientError
 import firebase_admin
 from firebase_admin import credentials
+from firebase_admin import exceptions
 import os
 
 from firebase_admin import messaging
 
+from rateLimit import TokenBucket
+from secretsProvider import get_secrets_provider
+
 DIRS = 'dirs'
 AEGIX = 'aegix'
 DIRS_FCM_APP_NAME = 'dirs_fcm_app'
@@ -17,6 +24,26 @@ default_body = "This is test notification to see if the push notifications are v
 default_secret_type = 'boto3'
 default_chunk_size = 500
 default_dry_run = False
+# FCM allows 600k messages per minute per project
+default_rate_limit = 10000
+# messaging.send_each already uses a thread per message of the chunk
+default_max_workers = 2
+default_max_retries = 3
+default_retry_base_delay = 1
+default_retry_max_delay = 10
+# seconds left for updating the tokens and sending the emails after the retries
+default_retry_time_margin = 15
+# error codes of the legacy API and of firebase_admin.exceptions worth retrying
+transient_error_codes = ['internal-error', exceptions.INTERNAL, exceptions.UNAVAILABLE]
+# seconds the credentials read from SSM and Secrets Manager are reused by warm invocations
+default_credentials_ttl = 3600
+
+# credentials by secret type and Firebase apps by name, kept across warm invocations
+fcm_credentials_cache = {}
+fcm_apps = {}
+fcm_cache_lock = threading.Lock()
+# keys of the service account credentials, without which the apps can't send
+required_credentials_keys = ('type', 'client_email', 'private_key')
 
 
 def chunks(lst, n):
@@ -24,6 +51,32 @@ def chunks(lst, n):
         yield lst[i:i + n]
 
 
+def has_credentials(credentials_json):
+    """
+    Check the service account credentials have what firebase_admin needs to sign in
+    """
+    return bool(credentials_json) and all(credentials_json.get(key) for key in required_credentials_keys)
+
+
+def get_or_initialize_app(name, credentials_json):
+    """
+    Get the Firebase app with this name, initializing it again only when its credentials changed
+    :param name: app name
+    :param credentials_json: service account credentials
+    :return: firebase_admin.App
+    """
+    cached = fcm_apps.get(name)
+    if cached and cached[0] == credentials_json:
+        return cached[1]
+    try:
+        firebase_admin.delete_app(firebase_admin.get_app(name))
+    except ValueError:
+        pass
+    app = firebase_admin.initialize_app(credentials.Certificate(credentials_json), name=name)
+    fcm_apps[name] = (dict(credentials_json), app)
+    return app
+
+
 class FirebaseService:
     """
     Class for sending the push notifications using the Firebase API using multiple Firebase apps.
@@ -37,6 +90,19 @@ class FirebaseService:
         dry_run (bool): A boolean indicating whether to run the operation in dry run mode (optional).
         secret_method_type (str):  The type of the secret method (optional).
           - Default: boto3
+        rate_limit (int): Messages per second sent to each Firebase app (optional).
+        max_workers (int): Chunks sent at the same time across all apps (optional).
+        send_each (callable): Replacement of messaging.send_each, e.g. a fake FCM transport (optional).
+        max_retries (int): Retries of the tokens failing with an internal error (optional).
+        retry_base_delay (float): Seconds before the first retry, doubled for every next one (optional).
+        retry_max_delay (float): Maximum seconds between the retries (optional).
+        get_remaining_time_in_millis (callable): The Lambda context's method, retries stop when the time left
+            goes below retry_time_margin seconds (optional).
+        retry_time_margin (float): Seconds kept for the work after sending the notifications (optional).
+        credentials_ttl (float): Seconds the credentials are reused by the next instances before they are
+            read again (optional).
+        secrets_provider (SecretsProvider): Source of the Secrets Manager secrets, e.g. a StaticSecretsProvider
+            for offline tests (optional).
         Returns:
             failed_tokens (list): List of failed tokens
         """
@@ -53,6 +119,18 @@ class FirebaseService:
         self.dirs_fcm_app = None
         self.aegix_fcm_app = None
         self.secret_method_type = kwargs.get('secret_type', default_secret_type)
+        self.rate_limit = kwargs.get('rate_limit', default_rate_limit)
+        self.max_workers = kwargs.get('max_workers', default_max_workers)
+        self.send_each = kwargs.get('send_each', messaging.send_each)
+        self.max_retries = kwargs.get('max_retries', default_max_retries)
+        self.retry_base_delay = kwargs.get('retry_base_delay', default_retry_base_delay)
+        self.retry_max_delay = kwargs.get('retry_max_delay', default_retry_max_delay)
+        self.get_remaining_time_in_millis = kwargs.get('get_remaining_time_in_millis')
+        self.retry_time_margin = kwargs.get('retry_time_margin', default_retry_time_margin)
+        self.credentials_ttl = kwargs.get('credentials_ttl', default_credentials_ttl)
+        self.secrets_provider = kwargs.get('secrets_provider') or get_secrets_provider(
+            self.firebase_secret_manager_region)
+        self.rate_limiters = {}
         self.__create_app()
 
     def __get_default_secret(self):
@@ -71,30 +149,40 @@ class FirebaseService:
             self.__get_default_secret()
 
     def __create_app(self):
-        self.__get_secret()
-        if self.aegix_fcm_json:
-            self.aegix_fcm_app = firebase_admin.initialize_app(credentials.Certificate(self.aegix_fcm_json),
-                                                               name=AEGIX_FCM_APP_NAME)
-        if self.dirs_fcm_json:
-            self.dirs_fcm_app = firebase_admin.initialize_app(credentials.Certificate(self.dirs_fcm_json),
-                                                              name=DIRS_FCM_APP_NAME)
-
-    def get_data_from_secret_manager(self, secret_key):
-        session = boto3.session.Session()
-        client = session.client(
-            service_name='secretsmanager',
-            region_name=self.firebase_secret_manager_region
-        )
-        try:
-            get_secret_value_response = client.get_secret_value(
-                SecretId=secret_key
-            )
-            secret_string = get_secret_value_response['SecretString']
-            return json.loads(secret_string)
-        except ClientError as e:
-            message = f"Error in getting  secret details using boto3: Error {str(e)}"
-            print(message)
-        return {}
+        """
+        Initialize the Firebase apps with the cached credentials, or with the ones read from SSM and
+        Secrets Manager. The credentials are cached only when both are complete and both apps initialized,
+        so a failed read is retried by the next instance.
+        """
+        with fcm_cache_lock:
+            try:
+                cached = fcm_credentials_cache.get(self.secret_method_type)
+                if cached and time.monotonic() - cached['loaded_at'] < self.credentials_ttl:
+                    self.dirs_fcm_json = cached['dirs_fcm_json']
+                    self.aegix_fcm_json = cached['aegix_fcm_json']
+                else:
+                    cached = None
+                    self.__get_secret()
+                for name, fcm_json in ((AEGIX_FCM_APP_NAME, self.aegix_fcm_json),
+                                       (DIRS_FCM_APP_NAME, self.dirs_fcm_json)):
+                    if fcm_json and not has_credentials(fcm_json):
+                        missing_keys = [key for key in required_credentials_keys if not fcm_json.get(key)]
+                        error_message = f'Error in getting the credentials of {name}: missing {missing_keys}'
+                        print(error_message)
+                        raise Exception(error_message)
+                if self.aegix_fcm_json:
+                    self.aegix_fcm_app = get_or_initialize_app(AEGIX_FCM_APP_NAME, self.aegix_fcm_json)
+                if self.dirs_fcm_json:
+                    self.dirs_fcm_app = get_or_initialize_app(DIRS_FCM_APP_NAME, self.dirs_fcm_json)
+            except Exception:
+                fcm_credentials_cache.pop(self.secret_method_type, None)
+                raise
+            if cached is None and has_credentials(self.dirs_fcm_json) and has_credentials(self.aegix_fcm_json):
+                fcm_credentials_cache[self.secret_method_type] = {
+                    'loaded_at': time.monotonic(),
+                    'dirs_fcm_json': self.dirs_fcm_json,
+                    'aegix_fcm_json': self.aegix_fcm_json,
+                }
 
     def get_data_from_system_manager(self):
         ssm = boto3.client('ssm')
@@ -119,11 +207,13 @@ class FirebaseService:
                 'secret_name': self.firebase_aegix_fcm_secret_name
             }
         ]
+        secrets = self.secrets_provider.get_secrets([fcm_detail.get('secret_name') for fcm_detail in fcm_details
+                                                     if fcm_detail.get('secret_name')])
         for fcm_detail in fcm_details:
             fcm_for = fcm_detail.get('name')
             fcm_secret = fcm_detail.get('secret_name')
             if fcm_for and fcm_secret:
-                secret_json = self.get_data_from_secret_manager(fcm_secret)
+                secret_json = secrets.get(fcm_secret)
                 if not secret_json:
                     continue
                 try:
@@ -143,44 +233,110 @@ class FirebaseService:
                     print(error_message)
                     raise Exception(error_message)
 
-    def send_batch_push_notification(self, message_obj, notification_app, users):
+    def send_chunk(self, chunk, notification_app, rate_limiter):
+        rate_limiter.acquire(len(chunk))
+        try:
+            batch_response = self.send_each(chunk, app=notification_app, dry_run=self.dry_run)
+        except Exception as e:
+            message = f'Exception Sending Push notification. Exception: {str(e)}'
+            print(message)
+            raise Exception(message)
+        print(
+            f'Message batch attempted: Count={len(chunk)}; '
+            f'Sent={batch_response.success_count}; '
+            f'Failed={batch_response.failure_count}; '
+        )
+        return batch_response
+
+    def send_chunks(self, app_messages):
+        """
+        Send the messages of every app in chunks, several chunks at a time.
+        Chunks of the apps are interleaved so that one app waiting on its rate limit doesn't hold up the others,
+        and the responses are read in the order the chunks were built.
+        :param app_messages: list of (app, messages) tuples
+        :return: list of (app, message, response) tuples
+        """
+        app_chunks = []
+        for notification_app, messages in app_messages:
+            if notification_app not in self.rate_limiters:
+                self.rate_limiters[notification_app] = TokenBucket(self.rate_limit)
+            app_chunks.append((notification_app, list(chunks(messages, self.chunk_size)),
+                               self.rate_limiters[notification_app]))
+        app_futures = [[] for _ in app_chunks]
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for i in range(max([len(_chunks) for _, _chunks, _ in app_chunks], default=0)):
+                for futures, (notification_app, _chunks, rate_limiter) in zip(app_futures, app_chunks):
+                    if i < len(_chunks):
+                        futures.append(executor.submit(self.send_chunk, _chunks[i], notification_app, rate_limiter))
+            try:
+                for (notification_app, _chunks, _), futures in zip(app_chunks, app_futures):
+                    for chunk, future in zip(_chunks, futures):
+                        batch_response = future.result()
+                        results.extend((notification_app, message, response)
+                                       for message, response in zip(chunk, batch_response.responses))
+            except Exception:
+                executor.shutdown(cancel_futures=True)
+                raise
+        return results
+
+    def has_time_for_retry(self, delay, send_time):
+        if not self.get_remaining_time_in_millis:
+            return True
+        remaining_time = self.get_remaining_time_in_millis() / 1000
+        return remaining_time - delay - send_time > self.retry_time_margin
+
+    def send_batch_push_notification(self, app_messages, max_retries=None):
+        """
+        Send the messages and retry the tokens failing with a transient (internal or unavailable) error.
+        Only those tokens are sent again, in full chunks, after an exponential backoff with jitter,
+        as long as max_retries and the Lambda's remaining time allow it.
+        :param app_messages: list of (app, messages) tuples
+        :param max_retries: overrides the max_retries of the instance, e.g. 0 to retry the tokens later in one go
+        :return: failed tokens, success tokens, tokens still failing with an internal error
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
         invalid_tokens = []
         failed_tokens = []
         success_tokens = []
-        internal_error_tokens = []
-        for chunk in chunks(message_obj, self.chunk_size):
-            try:
-                batch_response = messaging.send_each(chunk, app=notification_app, dry_run=self.dry_run)
-                print(
-                    f'Message batch attempted: Count={len(chunk)}; '
-                    f'Sent={batch_response.success_count}; '
-                    f'Failed={batch_response.failure_count}; '
-                )
-                for i, response in enumerate(batch_response.responses):
-                    if response.success:
-                        success_tokens.append(chunk[i].token)
+        attempt = 0
+        while True:
+            started_at = time.monotonic()
+            retry_messages = {}
+            for notification_app, message, response in self.send_chunks(app_messages):
+                if response.success:
+                    success_tokens.append(message.token)
+                else:
+                    if response.exception.code in [
+                        'invalid-recipient',
+                        'invalid-registration-token',
+                        'registration-token-not-registered'
+                    ]:
+                        invalid_tokens.append(message.token)
+                    elif response.exception.code in transient_error_codes:
+                        retry_messages.setdefault(notification_app, []).append(message)
                     else:
-                        if response.exception.code in [
-                            'invalid-recipient',
-                            'invalid-registration-token',
-                            'registration-token-not-registered'
-                        ]:
-                            invalid_tokens.append(chunk[i].token)
-                        elif response.exception.code == 'internal-error':
-                            internal_error_tokens.append(chunk[i].token)
-                        else:
-                            failed_tokens.append(chunk[i].token)
-            except Exception as e:
-                message = f'Exception Sending Push notification. Exception: {str(e)}'
-                print(message)
-                raise Exception(message)
-        failed_token_lists = invalid_tokens + failed_tokens + internal_error_tokens
-        return failed_token_lists, success_tokens
-
-    def send_push_notification_to_users(self, users):
+                        failed_tokens.append(message.token)
+            if not retry_messages or attempt >= max_retries:
+                break
+            delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+            if not self.has_time_for_retry(delay, time.monotonic() - started_at):
+                print('Not enough time left to retry the tokens failing with an internal error')
+                break
+            attempt += 1
+            app_messages = list(retry_messages.items())
+            print(f'Retrying {sum([len(messages) for _, messages in app_messages])} tokens failing with '
+                  f'an internal error in {delay:.1f}s (attempt {attempt} of {max_retries})')
+            time.sleep(delay)
+        internal_error_tokens = [message.token for messages in retry_messages.values() for message in messages]
+        return invalid_tokens + failed_tokens, success_tokens, internal_error_tokens
+
+    def send_push_notification_to_users(self, users, max_retries=None):
         push_notification_apps_detail = []
         failed_tokens = []
         success_tokens = []
+        internal_error_tokens = []
         if self.aegix_fcm_app:
             push_notification_apps_detail.append({
                 'name': AEGIX,
@@ -192,35 +348,35 @@ class FirebaseService:
 
         if not len(push_notification_apps_detail):
             print("No push notification apps is found")
-            return failed_tokens, success_tokens
+            return set(failed_tokens), set(success_tokens), set(internal_error_tokens)
 
-        dirs_tokens = []
-        aegix_tokens = []
         dirs_message = []
         aegix_messages = []
-        data = {
+        dirs_data = {
+            "title": self.title.format('DIR-S'),
+            "body": self.body
+        }
+        aegix_data = {
+            "title": self.title.format('Aegix AIM'),
             "body": self.body
         }
 
         for user in users:
             if user.get('app_name') == DIRS:
-                data['title'] = self.title.format('DIR-S')
-                dirs_tokens.append(user)
                 dirs_message.append(
                     messaging.Message(
                         token=user.get('token'),
-                        data=data
+                        data=dirs_data
                     )
                 )
             else:
-                data['title'] = self.title.format('Aegix AIM')
-                aegix_tokens.append(user)
                 aegix_messages.append(
                     messaging.Message(
                         token=user.get('token'),
-                        data=data
+                        data=aegix_data
                     )
                 )
+        app_messages = []
         for push_notification_app_detail in push_notification_apps_detail:
             push_notification_app = push_notification_app_detail.get('app')
             app_type = push_notification_app_detail.get('name')
@@ -228,7 +384,7 @@ class FirebaseService:
                 messages = dirs_message
             else:
                 messages = aegix_messages
-            _failed_tokens, _success_tokens = self.send_batch_push_notification(messages, push_notification_app, users)
-            failed_tokens.extend(_failed_tokens)
-            success_tokens.extend(_success_tokens)
-        return list(set(failed_tokens)), list(set(success_tokens))
+            app_messages.append((push_notification_app, messages))
+        failed_tokens, success_tokens, internal_error_tokens = self.send_batch_push_notification(app_messages,
+                                                                                                 max_retries)
+        return set(failed_tokens), set(success_tokens), set(internal_error_tokens)
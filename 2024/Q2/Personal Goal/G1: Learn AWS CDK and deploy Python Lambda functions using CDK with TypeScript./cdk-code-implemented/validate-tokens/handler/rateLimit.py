@@ -0,0 +1,33 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket limiting the messages sent per second.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: tokens added per second
+        :param capacity: maximum burst of tokens (default: rate)
+        """
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, count=1):
+        """
+        Take count tokens, sleeping until they are available.
+        Tokens are reserved before sleeping so concurrent callers queue up behind each other.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= count
+            wait = -self.tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+# seconds a secret is reused before it is read again
+default_secrets_ttl = 3600
+# secret ids per BatchGetSecretValue call
+batch_size = 20
+
+secrets_providers = {}
+secrets_providers_lock = threading.Lock()
+
+
+class SecretsProvider:
+    """
+    Class for reading JSON secrets from AWS Secrets Manager with one client and a TTL cache.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the SecretsProvider instance.
+        region_name (str): Region of the secrets (optional).
+        client: Secrets Manager client, e.g. a stub for offline tests (optional).
+          - Default: created on the first read
+        ttl (float): Seconds a secret is reused before it is read again (optional).
+        """
+        self.region_name = kwargs.get('region_name')
+        self.client = kwargs.get('client')
+        self.ttl = kwargs.get('ttl', default_secrets_ttl)
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.batch_supported = True
+
+    def get_client(self):
+        if self.client is None:
+            self.client = boto3.session.Session().client(
+                service_name='secretsmanager',
+                region_name=self.region_name
+            )
+        return self.client
+
+    def get_secrets(self, secret_ids):
+        """
+        Get the secrets, reading the ones not cached in a single BatchGetSecretValue call
+        per 20 ids, or with concurrent GetSecretValue calls when batch reads aren't available.
+        :param secret_ids: list of secret names or ARNs
+        :return: dict of secret id -> secret JSON, None for the secrets that couldn't be read
+        """
+        now = time.monotonic()
+        secrets = {}
+        with self.lock:
+            for secret_id in secret_ids:
+                cached = self.cache.get(secret_id)
+                if cached and now - cached[0] < self.ttl:
+                    secrets[secret_id] = cached[1]
+        missing = [secret_id for secret_id in dict.fromkeys(secret_ids) if secret_id not in secrets]
+        if missing:
+            loaded = self.batch_get_secrets(missing) if self.batch_supported else {}
+            unresolved = [secret_id for secret_id in missing if secret_id not in loaded]
+            if unresolved:
+                with ThreadPoolExecutor(max_workers=len(unresolved)) as executor:
+                    loaded.update(zip(unresolved, executor.map(self.read_secret, unresolved)))
+            with self.lock:
+                for secret_id in missing:
+                    if loaded[secret_id] is not None:
+                        self.cache[secret_id] = (now, loaded[secret_id])
+            secrets.update(loaded)
+        return secrets
+
+    def get_secret(self, secret_id):
+        """
+        Get one secret, from the cache when it's fresh
+        :param secret_id: secret name or ARN
+        :return: secret JSON, or None when it couldn't be read
+        """
+        return self.get_secrets([secret_id])[secret_id]
+
+    def read_secret(self, secret_id):
+        try:
+            response = self.get_client().get_secret_value(SecretId=secret_id)
+            return json.loads(response['SecretString'])
+        except (ClientError, BotoCoreError, ValueError) as e:
+            print(f"Error in getting secret {secret_id} using boto3: Error {str(e)}")
+        return None
+
+    def batch_get_secrets(self, secret_ids):
+        """
+        Read the secrets with BatchGetSecretValue
+        :param secret_ids: list of secret names or ARNs
+        :return: dict of secret id -> secret JSON, or None for the secrets reported as errors;
+            ids missing from it are left to GetSecretValue
+        """
+        secrets = {}
+        try:
+            client = self.get_client()
+            for i in range(0, len(secret_ids), batch_size):
+                ids = secret_ids[i:i + batch_size]
+                response = client.batch_get_secret_value(SecretIdList=ids)
+                for secret_value in response.get('SecretValues', []):
+                    for secret_id in ids:
+                        if secret_id in (secret_value.get('Name'), secret_value.get('ARN')):
+                            secrets[secret_id] = json.loads(secret_value['SecretString'])
+                for error in response.get('Errors', []):
+                    if error.get('SecretId') in ids:
+                        secrets[error.get('SecretId')] = None
+                    print(f"Error in getting secret {error.get('SecretId')} using boto3: "
+                          f"Error {error.get('ErrorCode')} {error.get('Message')}")
+        except (ClientError, BotoCoreError, AttributeError, ValueError) as e:
+            # e.g. no secretsmanager:BatchGetSecretValue permission or an old botocore
+            self.batch_supported = False
+            print(f"Error in getting secrets in a batch using boto3, reading them one by one: Error {str(e)}")
+        return secrets
+
+
+class StaticSecretsProvider(SecretsProvider):
+    """
+    Secrets provider serving fixed secrets, for offline tests.
+    """
+
+    def __init__(self, secrets, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.secrets = secrets
+
+    def read_secret(self, secret_id):
+        return self.secrets.get(secret_id)
+
+    def batch_get_secrets(self, secret_ids):
+        return {secret_id: self.secrets[secret_id] for secret_id in secret_ids if secret_id in self.secrets}
+
+
+def get_secrets_provider(region_name):
+    """
+    Get the secrets provider of the region shared by the invocations of a warm Lambda container
+    """
+    with secrets_providers_lock:
+        if region_name not in secrets_providers:
+            secrets_providers[region_name] = SecretsProvider(region_name=region_name)
+        return secrets_providers[region_name]
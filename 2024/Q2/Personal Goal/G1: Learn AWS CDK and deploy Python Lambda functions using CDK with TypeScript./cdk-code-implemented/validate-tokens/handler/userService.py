@@ -1,7 +1,33 @@
 import requests
 import json
 import os
-from typing import Dict, List
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# connections kept open to the API, enough for the page prefetch and parallel bulk updates
+default_pool_size = 10
+# ids per bulk update request, requests sent at a time and retries of a failed request
+default_bulk_chunk_size = 1000
+default_bulk_max_workers = 4
+default_bulk_max_retries = 2
+default_bulk_retry_delay = 0.5
+http_session = None
+
+
+def get_http_session():
+    """
+    Get the requests session shared by the invocations of a warm Lambda container,
+    so the connections to the API (TCP and TLS handshakes) are reused.
+    """
+    global http_session
+    if http_session is None:
+        http_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=default_pool_size, pool_block=True)
+        http_session.mount('https://', adapter)
+        http_session.mount('http://', adapter)
+    return http_session
 
 
 class UserService:
@@ -22,6 +48,11 @@ class UserService:
         self.email = os.environ['USER_EMAIL']
         self.password = os.environ['USER_PASSWORD']
         self.authentication_token = None
+        self.session = kwargs.get('session') or get_http_session()
+        self.bulk_chunk_size = kwargs.get('bulk_chunk_size', default_bulk_chunk_size)
+        self.bulk_max_workers = kwargs.get('bulk_max_workers', default_bulk_max_workers)
+        self.bulk_max_retries = kwargs.get('bulk_max_retries', default_bulk_max_retries)
+        self.bulk_retry_delay = kwargs.get('bulk_retry_delay', default_bulk_retry_delay)
 
     def authenticate(self):
         payload = {
@@ -32,33 +63,89 @@ class UserService:
           "Content-Type": "application/json"
         }
         login_url = f"{self.base_url}/api/v1/auth/"
-        response = requests.post(login_url, headers=headers, data=json.dumps(payload))
+        response = self.session.post(login_url, headers=headers, data=json.dumps(payload))
         if response.status_code == 201:
             data = json.loads(response.text)
             self.authentication_token = data.get('jwt')
         return self
 
-    def get_fcm_tokens(self):
-        users = []
-        if not self.authentication_token:
-            return users
+    def get_fcm_tokens_page(self, users_url):
+        """
+        Get one page of the users' tokens
+        :param users_url: url of the page
+        :return: list of users, url of the next page or None
+        """
         headers = {
           "Content-Type": "application/json",
           "Authorization": f"JWT {self.authentication_token}"
         }
-        users_url = f"{self.base_url}/api/v2/user/fcm-users"
         try:
-            while users_url:
-                response = requests.get(users_url, headers=headers)
-                if response.status_code == 200:
-                    data = json.loads(response.text)
-                    users.extend(data.get('fcm_user_list'))
-                    users_url = data.get('next')
-                else:
-                    break
+            response = self.session.get(users_url, headers=headers)
+            if response.status_code == 200:
+                data = json.loads(response.text)
+                return data.get('fcm_user_list') or [], data.get('next')
         except Exception as e:
             print(f"Exception while getting users: {str(e)}")
-        return users
+        return [], None
+
+    def iter_fcm_token_pages(self):
+        """
+        Yield the pages of the users' tokens.
+        The next page is fetched in the background while the current one is processed.
+        :return: generator of lists of users with id, token, and user_id
+        """
+        if not self.authentication_token:
+            return
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = executor.submit(self.get_fcm_tokens_page, f"{self.base_url}/api/v2/user/fcm-users")
+            while page:
+                users, users_url = page.result()
+                page = executor.submit(self.get_fcm_tokens_page, users_url) if users_url else None
+                yield users
+
+    def post_ids(self, url, fcm_ids):
+        """
+        POST one chunk of ids, retrying server errors with a backoff.
+        A chunk rejected as too large is split in halves.
+        :param url: bulk update url
+        :param fcm_ids: list of ids
+        :return: list of the ids that could not be updated
+        """
+        headers = {
+          "Content-Type": "application/json",
+          "Authorization": f"JWT {self.authentication_token}"
+        }
+        for attempt in range(self.bulk_max_retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, self.bulk_retry_delay * 2 ** attempt))
+            try:
+                response = self.session.post(url, headers=headers, json={'ids': fcm_ids})
+            except Exception as e:
+                print(f"Exception while posting {len(fcm_ids)} ids to {url}: {str(e)}")
+                continue
+            if response.ok:
+                return []
+            if response.status_code == 413 and len(fcm_ids) > 1:
+                middle = len(fcm_ids) // 2
+                return self.post_ids(url, fcm_ids[:middle]) + self.post_ids(url, fcm_ids[middle:])
+            print(f"Error {response.status_code} while posting {len(fcm_ids)} ids to {url}")
+            if response.status_code < 500 and response.status_code != 429:
+                break
+        return fcm_ids
+
+    def post_ids_in_chunks(self, url, fcm_ids):
+        """
+        POST the ids in chunks of bulk_chunk_size, bulk_max_workers chunks at a time
+        :param url: bulk update url
+        :param fcm_ids: list of ids
+        :return: list of the ids that could not be updated
+        """
+        id_chunks = [fcm_ids[i:i + self.bulk_chunk_size] for i in range(0, len(fcm_ids), self.bulk_chunk_size)]
+        if len(id_chunks) == 1:
+            return self.post_ids(url, id_chunks[0])
+        with ThreadPoolExecutor(max_workers=self.bulk_max_workers) as executor:
+            return [fcm_id for failed_ids in executor.map(lambda ids: self.post_ids(url, ids), id_chunks)
+                    for fcm_id in failed_ids]
 
     def deactivate_failed_fcm_tokens(self, fcm_ids):
         """
@@ -67,15 +154,10 @@ class UserService:
         :return: String
         """
         if len(fcm_ids):
-            try:
-                headers = {
-                  "Content-Type": "application/json",
-                  "Authorization": f"JWT {self.authentication_token}"
-                }
-                url = f"{self.base_url}/api/v2/fcm-token/bulk_deactivate/"
-                requests.post(url, headers=headers, json={'ids': fcm_ids})
-            except Exception as e:
-                print(f"Exception while deactivating FCM user's token: {str(e)}")
+            url = f"{self.base_url}/api/v2/fcm-token/bulk_deactivate/"
+            failed_ids = self.post_ids_in_chunks(url, fcm_ids)
+            if len(failed_ids):
+                return f"Failed to deactivate {len(failed_ids)} of {len(fcm_ids)} FCM tokens: {failed_ids}"
             return "Success in deactivating users' token"
         return "No FCM token found to deactivate"
 
@@ -86,48 +168,58 @@ class UserService:
         :return: String
         """
         if len(fcm_ids):
-            try:
-                headers = {
-                  "Content-Type": "application/json",
-                  "Authorization": f"JWT {self.authentication_token}"
-                }
-                url = f"{self.base_url}/api/v2/fcm-token/bulk-update-on-updated/"
-                requests.post(url, headers=headers, json={'ids': fcm_ids})
-            except Exception as e:
-                print(f"Exception while update the FCM updated_at date: {str(e)}")
+            url = f"{self.base_url}/api/v2/fcm-token/bulk-update-on-updated/"
+            failed_ids = self.post_ids_in_chunks(url, fcm_ids)
+            if len(failed_ids):
+                return f"Failed to update the FCM updated_at date of {len(failed_ids)} of {len(fcm_ids)} tokens: " \
+                       f"{failed_ids}"
             return "Success in updating the FCM updated_at date"
         return "No users found to update the FCM updated_at date"
 
-    def get_failed_users_from_failed_tokens(self, failed_users, failed_user_id_dict_with_failed_platform):
-        """
-        Send the email to failed users
-        :param failed_users: list of users with id, token_id, platform, full_name, email
-        :param failed_user_id_dict_with_failed_platform: lists ot user_ids with failed platform
-        :return: list of failed users with id, token_id, platform, full_name, email
-        """
 
-        existing_used_details = {}
-        failed_user_details = []
-        for user in failed_users:
-            user_id = user.get('user_id')
-            user_failed_platform = failed_user_id_dict_with_failed_platform.get(user_id, [])
-            if user.get('platform') in user_failed_platform:
-                if user_id not in existing_used_details:
-                    existing_used_details[user_id] = []
-                if user.get('platform') not in existing_used_details[user_id]:
-                    failed_user_details.append({**user})
-                    existing_used_details[user_id].append(user.get('platform'))
-        return failed_user_details
+class TokenReconciler:
+    """
+    Class for splitting the users' tokens by the push notification result, one batch at a time.
+    A platform of a user is failed only when none of its tokens succeeded,
+    and it's left alone when the result of one of its tokens is unknown.
+    Only the (user_id, platform) pairs seen to work and the tokens of the failed ones are kept.
+    """
 
-    def save_unique_platform_in_user_dict(self, data_list: Dict[int, List[str]], platform: str, user_id: int):
+    def __init__(self, *args, **kwargs):
+        self.skipped_platforms = set()
+        self.failed_platforms = {}
+
+    def add(self, fcm_user_tokens, success_tokens, unknown_tokens=()):
         """
-        Save the unique platform in the dict of users
-        :param data_list: dict of users with list of unique platform or empty dict
-        :param platform: str ->  token of user
-        :return: dict of users with list of unique platform
+        Add the results of a batch
+        :param fcm_user_tokens: list of users with id, token, user_id, platform, full_name, email
+        :param success_tokens: set of tokens the push notification was sent to
+        :param unknown_tokens: set of tokens that failed with a transient error
+        :return: list of the tokens that succeeded
         """
+        success_fcm_ids = []
+        for fcm_user_token in fcm_user_tokens:
+            token = fcm_user_token.get('token')
+            key = (fcm_user_token.get('user_id'), fcm_user_token.get('platform'))
+            if token in success_tokens or token in unknown_tokens:
+                if token in success_tokens:
+                    success_fcm_ids.append(token)
+                self.skipped_platforms.add(key)
+                self.failed_platforms.pop(key, None)
+            elif key not in self.skipped_platforms:
+                failed = self.failed_platforms.get(key)
+                if failed is None:
+                    failed = self.failed_platforms[key] = ({**fcm_user_token}, [])
+                failed[1].append(token)
+        return success_fcm_ids
 
-        if not data_list.get(user_id, []):
-            data_list[user_id] = []
-        if platform not in data_list[user_id]:
-            data_list[user_id].append(platform)
+    def failed(self):
+        """
+        Get the failed platforms once all the batches are added
+        :return: tuple of
+            failed_fcm_ids (list): tokens of the failed platforms
+            failed_users (list): first user of every failed user_id and platform
+        """
+        failed_fcm_ids = [token for _, tokens in self.failed_platforms.values() for token in tokens]
+        failed_users = [user for user, _ in self.failed_platforms.values()]
+        return failed_fcm_ids, failed_users
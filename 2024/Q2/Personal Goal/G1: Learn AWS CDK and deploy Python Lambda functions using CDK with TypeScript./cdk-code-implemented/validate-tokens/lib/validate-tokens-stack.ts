@@ -46,6 +46,14 @@ export class ValidateTokensStack extends Stack {
       })
     );
 
+    // BatchGetSecretValue has no resource-level permissions, GetSecretValue above still applies per secret
+    lambdaExecutionRole.addToPolicy(
+      new iam.PolicyStatement({
+        actions: ['secretsmanager:BatchGetSecretValue'],
+        resources: ['*'],
+      })
+    );
+
     // create layer
     const validateTokenLayer = new LayerVersion(
       this,
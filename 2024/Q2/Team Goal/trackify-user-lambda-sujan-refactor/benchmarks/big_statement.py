@@ -0,0 +1,96 @@
+"""
+Send time and peak allocation of one big statement.
+
+Sends a statement of --size MB with Connection._execute_command() over a
+socketpair (a thread reads and discards the other end), and the same
+statement the way it was sent before scatter writes: one copy of the rest
+of the statement per 16MB packet plus a joined header and payload.
+Allocations are measured with tracemalloc, in a separate run from the
+timings.
+
+Usage (from the function's directory):
+
+    python benchmarks/big_statement.py --size 64 --runs 5
+"""
+
+import argparse
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymysql.connections import MAX_PACKET_LEN, Connection, _pack_int24  # noqa: E402
+from pymysql.constants import COMMAND  # noqa: E402
+
+
+def drain(sock):
+    while sock.recv(1 << 20):
+        pass
+
+
+def legacy_execute_command(conn, command, sql):
+    """Connection._execute_command before it used scatter writes."""
+    packet_size = min(MAX_PACKET_LEN, len(sql) + 1)
+    conn._write_bytes(struct.pack("<iB", packet_size, command) + sql[: packet_size - 1])
+    seq_id = 1
+    if packet_size < MAX_PACKET_LEN:
+        return
+    sql = sql[packet_size - 1 :]
+    while True:
+        packet_size = min(MAX_PACKET_LEN, len(sql))
+        header = _pack_int24(packet_size) + bytes([seq_id])
+        conn._write_bytes(header + sql[:packet_size])
+        seq_id = (seq_id + 1) % 256
+        sql = sql[packet_size:]
+        if not sql and packet_size < MAX_PACKET_LEN:
+            break
+
+
+def measure(send, sql, runs):
+    """Return (best seconds, peak allocated bytes) of sending *sql*."""
+    conn = Connection(defer_connect=True)
+    conn._sock, other = socket.socketpair()
+    reader = threading.Thread(target=drain, args=(other,))
+    reader.start()
+    try:
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            send(conn, COMMAND.COM_QUERY, sql)
+            times.append(time.perf_counter() - start)
+        tracemalloc.start()
+        send(conn, COMMAND.COM_QUERY, sql)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        conn._sock.close()
+        reader.join()
+        other.close()
+    return min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=64, help="statement size in MB")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    sql = b"INSERT INTO t VALUES ('" + b"x" * (args.size * 1024 * 1024) + b"')"
+    print(f"## one {args.size}MB statement over a socketpair (best of {args.runs})\n")
+    print("| send | ms | peak allocation MB |")
+    print("|---|---:|---:|")
+    for name, send in [
+        ("copy per packet (before)", legacy_execute_command),
+        ("scatter write", Connection._execute_command),
+    ]:
+        elapsed, peak = measure(send, sql, args.runs)
+        print(f"| {name} | {elapsed * 1000:.0f} | {peak / 1024 / 1024:.1f} |")
+
+
+if __name__ == "__main__":
+    main()
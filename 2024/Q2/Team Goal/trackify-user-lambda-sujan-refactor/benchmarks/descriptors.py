@@ -0,0 +1,72 @@
+"""
+Parse time and memory of column descriptors and results.
+
+Times parsing one column definition packet into a FieldDescriptorPacket,
+measures the memory held by --count parsed descriptors with tracemalloc,
+and prints the size of a descriptor and of a MySQLResult.
+
+Usage (from the function's directory):
+
+    python benchmarks/descriptors.py --count 10000
+"""
+
+import argparse
+import os
+import struct
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymysql.connections import Connection, MySQLResult  # noqa: E402
+from pymysql.constants import FIELD_TYPE  # noqa: E402
+from pymysql.fakeserver import _lenenc_str  # noqa: E402
+from pymysql.protocol import FieldDescriptorPacket  # noqa: E402
+
+
+def column_definition(name):
+    """Payload of a VARCHAR(255) utf8mb4 column definition packet."""
+    return (
+        _lenenc_str("def")
+        + _lenenc_str("app")
+        + _lenenc_str("users")
+        + _lenenc_str("users")
+        + _lenenc_str(name)
+        + _lenenc_str(name)
+        + b"\x0c"
+        + struct.pack("<HIBHB", 255, 1020, FIELD_TYPE.VAR_STRING, 0, 0)
+        + b"\0\0"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    data = column_definition("email")
+    parse = min(
+        timeit.repeat(
+            lambda: FieldDescriptorPacket(data, "utf8"), number=args.number, repeat=5
+        )
+    )
+
+    payloads = [column_definition(f"column_{i}") for i in range(args.count)]
+    tracemalloc.start()
+    descriptors = [FieldDescriptorPacket(p, "utf8") for p in payloads]
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    result = MySQLResult(Connection(defer_connect=True))
+    print("| measure | value |")
+    print("|---|---:|")
+    print(f"| parse one descriptor | {parse / args.number * 1e6:.2f} us |")
+    print(f"| {args.count} retained descriptors | {retained / 1024 / 1024:.2f} MB |")
+    print(f"| descriptor size | {sys.getsizeof(descriptors[0])} B |")
+    print(f"| MySQLResult size | {sys.getsizeof(result)} B |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-value time of string escaping.
+
+Generates --count names and e-mail addresses, about a tenth of them with
+quotes, and times escape_string, escape_str and escape_item on them next
+to the ``translate(_escape_table)`` version used before. The output of
+escape_string is checked against translate() first.
+
+Usage (from the function's directory):
+
+    python benchmarks/escape.py --count 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymysql import converters  # noqa: E402
+
+FIRST = ["Jane", "John", "Anne", "Sean", "Mary", "Luis", "Chloe", "Kenji"]
+LAST = ["Doe", "Smith", "O'Brien", "D'Angelo", "Garcia", "Müller", "Nakamura"]
+
+
+def values(count, seed=1):
+    rnd = random.Random(seed)
+    result = []
+    for i in range(count):
+        name = f"{rnd.choice(FIRST)} {rnd.choice(LAST)}"
+        result.append(name if i % 2 else f"{name.split()[0].lower()}{i}@example.com")
+    return result
+
+
+def legacy_escape_string(value, mapping=None):
+    """escape_string before it skipped absent characters."""
+    return value.translate(converters._escape_table)
+
+
+def legacy_escape_str(value, mapping=None):
+    return "'%s'" % legacy_escape_string(str(value))
+
+
+def per_value(func, data):
+    start = time.perf_counter()
+    for value in data:
+        func(value)
+    return (time.perf_counter() - start) / len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+
+    data = values(args.count)
+    quoted = sum("'" in v for v in data)
+    for value in data:
+        assert converters.escape_string(value) == legacy_escape_string(value), value
+
+    legacy_mapping = {**converters.encoders, str: legacy_escape_str}
+    rows = [
+        ("escape_string", legacy_escape_string, converters.escape_string),
+        ("escape_str", legacy_escape_str, converters.escape_str),
+        (
+            "escape_item(str)",
+            lambda v: converters.escape_item(v, "utf8mb4", legacy_mapping),
+            lambda v: converters.escape_item(v, "utf8mb4"),
+        ),
+    ]
+    print(f"## {args.count} values, {quoted / args.count:.0%} with quotes\n")
+    print("| function | translate() ns | now ns |")
+    print("|---|---:|---:|")
+    for name, legacy, func in rows:
+        before = per_value(legacy, data)
+        now = per_value(func, data)
+        print(f"| {name} | {before * 1e9:.0f} | {now * 1e9:.0f} |")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Import time report for the Lambda cold start.
+
+Runs ``python -X importtime -c "import <module>"`` several times in fresh
+interpreters and prints the slowest imports as a table (median of the runs).
+
+Usage (from the function's directory):
+
+    python benchmarks/importtime.py pymysql lambda_function --runs 7 --top 15
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure(module, cwd):
+    """Return {module name: (self us, cumulative us, depth)} of one fresh import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": cwd},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr}")
+    result = {}
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            result[m.group(4)] = (int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2)
+    return result
+
+
+def report(module, runs, top, cwd):
+    samples = [measure(module, cwd) for _ in range(runs)]
+    names = set().union(*samples)
+    rows = []
+    for name in names:
+        values = [s[name] for s in samples if name in s]
+        rows.append(
+            (
+                name,
+                statistics.median(v[0] for v in values),
+                statistics.median(v[1] for v in values),
+                values[0][2],
+            )
+        )
+    rows.sort(key=lambda r: r[2], reverse=True)
+
+    print(f"## import {module} (median of {runs} runs)\n")
+    print("| module | depth | self ms | cumulative ms |")
+    print("|---|---:|---:|---:|")
+    for name, self_us, cumulative_us, depth in rows[:top]:
+        print(f"| {name} | {depth} | {self_us / 1000:.1f} | {cumulative_us / 1000:.1f} |")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["pymysql"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for module in args.modules:
+        report(module, args.runs, args.top, cwd)
+
+
+if __name__ == "__main__":
+    main()
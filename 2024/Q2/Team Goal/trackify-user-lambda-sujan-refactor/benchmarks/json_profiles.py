@@ -0,0 +1,85 @@
+"""
+Fetch + json.dumps time of the converter profiles.
+
+Serves a result of 8 columns (including DECIMAL, DATETIME, TIMESTAMP and
+DATE) from the in-process fake server, fetches it with each profile and
+serializes it like the lambda does, with ``json.dumps(default=str)``.
+Prints the best of several runs and checks "json" gives the same JSON as
+"default".
+
+Usage (from the function's directory):
+
+    python benchmarks/json_profiles.py --rows 20000 --runs 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pymysql  # noqa: E402
+from pymysql.constants import FIELD_TYPE  # noqa: E402
+from pymysql.fakeserver import FakeServer  # noqa: E402
+
+COLUMNS = [
+    ("id", FIELD_TYPE.LONG),
+    ("name", FIELD_TYPE.VAR_STRING),
+    ("email", FIELD_TYPE.VAR_STRING),
+    ("role", FIELD_TYPE.VAR_STRING),
+    ("balance", FIELD_TYPE.NEWDECIMAL),
+    ("created_at", FIELD_TYPE.DATETIME),
+    ("updated_at", FIELD_TYPE.TIMESTAMP),
+    ("birthday", FIELD_TYPE.DATE),
+]
+VALUES = [
+    b"12345678",
+    b"Jane Doe",
+    b"jane@example.com",
+    b"admin",
+    b"1234.50",
+    b"2024-01-02 03:04:05",
+    b"2024-01-02 03:04:05.123",
+    b"1990-05-06",
+]
+PROFILES = ["default", "json", "json-fast"]
+
+
+def fetch_and_dump(server, profile):
+    conn = pymysql.connect(conv=profile, **server.connect_args)
+    try:
+        start = time.perf_counter()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM users")
+            body = json.dumps(cursor.fetchall(), default=str)
+        return time.perf_counter() - start, body
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    bodies = {}
+    print(f"## fetch + json.dumps of {args.rows} rows (best of {args.runs})\n")
+    print("| profile | ms | us per row |")
+    print("|---|---:|---:|")
+    with FakeServer(COLUMNS, rows=args.rows, values=VALUES) as server:
+        for profile in PROFILES:
+            times = []
+            for _ in range(args.runs):
+                elapsed, bodies[profile] = fetch_and_dump(server, profile)
+                times.append(elapsed)
+            best = min(times)
+            print(f"| {profile} | {best * 1000:.0f} | {best / args.rows * 1e6:.1f} |")
+    assert bodies["json"] == bodies["default"], "json profile output differs"
+    print("\n\"json\" output is identical to \"default\".")
+
+
+if __name__ == "__main__":
+    main()
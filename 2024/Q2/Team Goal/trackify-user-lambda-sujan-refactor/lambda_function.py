@@ -3,6 +3,8 @@ import boto3
 import os
 import pymysql
 import logging
+from pymysql.tracing import LoggingTracer
+from pymysql.warmup import Warmup
 
 
 # Set logging
@@ -16,6 +18,18 @@ db_name = os.environ.get("DB_NAME")
 db_user = os.environ.get("DB_USER")
 db_password = os.environ.get("DB_PASSWORD")
 db_port = os.environ.get("DB_PORT")
+# Log per-query timings and packet counts, e.g. to spot N+1 query loops
+db_trace = os.environ.get("DB_TRACE", "").lower() in ("1", "true", "yes")
+# Seconds the init phase may spend opening the DB connection (0 disables)
+db_warmup_budget = float(os.environ.get("DB_WARMUP_BUDGET", "1.0"))
+
+# Column metadata of the handler queries, fetched during init without any rows
+PREFETCH_QUERIES = (
+    "SELECT id, name FROM roles LIMIT 0",
+    "SELECT id, name, privacy, status, client_id, createdAt, is_billable, type FROM projects LIMIT 0",
+    "SELECT id, name, email, status, role_id, createdAt, updatedAt, is_manager, phone FROM users LIMIT 0",
+    "SELECT project_id, status, createdAt, is_manager, worked_until FROM project_members LIMIT 0",
+)
 
 
 def json_response(status_code, message=None, data=None):
@@ -60,9 +74,31 @@ def get_server_key(event):
     return event.get("headers", {}).get("server_key")
 
 
+def connection_args():
+    """
+    Returns the arguments used for connecting to the MySQL database.
+
+    Returns:
+        dict: Keyword arguments for pymysql.connect().
+    """
+    return {
+        "host": rds_host,
+        "user": db_user,
+        "passwd": db_password,
+        "db": db_name,
+        "connect_timeout": 5,
+        "ssl": {"ssl": {"verify_mode": False}},
+        # Rows are only serialized with json.dumps(default=str), so skip
+        # building Decimal/date objects (same JSON as the default profile).
+        "conv": "json",
+        "tracer": LoggingTracer(logger) if db_trace else None,
+    }
+
+
 def connect_mysql_db():
     """
     Connects to a MySQL database using the provided credentials.
+    The connection opened during the init phase is used if it is ready.
 
     Returns:
         pymysql.Connection: A connection object if the connection is successful,
@@ -71,21 +107,26 @@ def connect_mysql_db():
     Raises:
         pymysql.MySQLError: If there is an error connecting to the database.
     """
+    connection = db_warmup.take() if db_warmup else None
+    if connection:
+        return connection
     try:
-        return pymysql.connect(
-            host=rds_host,
-            user=db_user,
-            passwd=db_password,
-            db=db_name,
-            connect_timeout=5,
-            ssl={"ssl": {"verify_mode": False}},
-        )
+        return pymysql.connect(**connection_args())
     except pymysql.MySQLError as e:
         logger.error("Unexpected error: Could not connect to MySQL instance")
         logger.error(e)
         return None
 
 
+# Connect while Lambda runs the init phase; falls back to connecting in the
+# handler when it doesn't finish within the budget.
+db_warmup = (
+    Warmup(db_warmup_budget, prefetch=PREFETCH_QUERIES, **connection_args())
+    if rds_host and db_warmup_budget > 0
+    else None
+)
+
+
 def get_user_meta(user_id, connection):
     """
     Retrieves metadata for a user from the project_members table in the database.
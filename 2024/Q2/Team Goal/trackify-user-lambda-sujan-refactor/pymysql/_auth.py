@@ -4,16 +4,6 @@ Implements auth methods
 
 from .err import OperationalError
 
-
-try:
-    from cryptography.hazmat.backends import default_backend
-    from cryptography.hazmat.primitives import serialization, hashes
-    from cryptography.hazmat.primitives.asymmetric import padding
-
-    _have_cryptography = True
-except ImportError:
-    _have_cryptography = False
-
 from functools import partial
 import hashlib
 
@@ -140,7 +130,13 @@ def sha2_rsa_encrypt(password, salt, public_key):
 
     Used for sha256_password and caching_sha2_password.
     """
-    if not _have_cryptography:
+    # Imported here: it is slow to import and only needed for full
+    # authentication over a plain connection.
+    try:
+        from cryptography.hazmat.backends import default_backend
+        from cryptography.hazmat.primitives import serialization, hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+    except ImportError:
         raise RuntimeError(
             "'cryptography' package is required for sha256_password or"
             + " caching_sha2_password auth methods"
@@ -3,29 +3,29 @@
 MBLENGTH = {8: 1, 33: 3, 88: 2, 91: 2}
 
 
+# Python codec of MySQL charsets whose name isn't one.
+_ENCODINGS = {
+    "utf8mb4": "utf8",
+    "utf8mb3": "utf8",
+    "latin1": "cp1252",
+    "koi8r": "koi8_r",
+    "koi8u": "koi8_u",
+}
+
+
 class Charset:
+    __slots__ = ("id", "name", "collation", "is_default", "encoding")
+
     def __init__(self, id, name, collation, is_default=False):
         self.id, self.name, self.collation = id, name, collation
         self.is_default = is_default
+        self.encoding = _ENCODINGS.get(name, name)
 
     def __repr__(self):
         return (
             f"Charset(id={self.id}, name={self.name!r}, collation={self.collation!r})"
         )
 
-    @property
-    def encoding(self):
-        name = self.name
-        if name in ("utf8mb4", "utf8mb3"):
-            return "utf8"
-        if name == "latin1":
-            return "cp1252"
-        if name == "koi8r":
-            return "koi8_r"
-        if name == "koi8u":
-            return "koi8_u"
-        return name
-
     @property
     def is_binary(self):
         return self.id == 63
@@ -40,14 +40,17 @@ class Charsets:
         self._by_id[c.id] = c
         if c.is_default:
             self._by_name[c.name] = c
+            if c.name == "utf8mb4":
+                self._by_name["utf8"] = c
 
     def by_id(self, id):
         return self._by_id[id]
 
     def by_name(self, name):
-        if name == "utf8":
-            name = "utf8mb4"
-        return self._by_name.get(name.lower())
+        c = self._by_name.get(name)
+        if c is None:
+            c = self._by_name.get(name.lower())
+        return c
 
 
 _charsets = Charsets()
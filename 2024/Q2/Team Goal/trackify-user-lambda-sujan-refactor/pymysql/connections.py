@@ -7,7 +7,7 @@ import os
 import socket
 import struct
 import sys
-import traceback
+from time import perf_counter
 import warnings
 
 from . import _auth
@@ -16,7 +16,7 @@ from .charset import charset_by_name, charset_by_id
 from .constants import CLIENT, COMMAND, CR, ER, FIELD_TYPE, SERVER_STATUS
 from . import converters
 from .cursors import Cursor
-from .optionfile import Parser
+from .tracing import QueryTrace
 from .protocol import (
     dump_packet,
     MysqlPacket,
@@ -27,14 +27,6 @@ from .protocol import (
 )
 from . import err, VERSION_STRING
 
-try:
-    import ssl
-
-    SSL_ENABLED = True
-except ImportError:
-    ssl = None
-    SSL_ENABLED = False
-
 try:
     import getpass
 
@@ -63,6 +55,22 @@ DEFAULT_CHARSET = "utf8mb4"
 
 MAX_PACKET_LEN = 2**24 - 1
 
+# Payloads at least this big are written as header + payload buffers
+# (socket.sendmsg) instead of being copied into one bytes object.
+SCATTER_WRITE_SIZE = 2**16
+
+# Process-wide caches making reconnects cheaper (e.g. warm Lambda invocations).
+# SSLContext built from the same ssl parameters.
+_ssl_context_cache = {}
+# (host, port) -> (SSLContext, SSLSession) of the last TLS connection.
+_ssl_session_cache = {}
+# (host, port) -> RSA public key used by sha256_password / caching_sha2_password.
+_server_public_key_cache = {}
+
+# Number of distinct result set layouts whose parsed column metadata is kept
+# per connection. 0 disables the cache.
+METADATA_CACHE_SIZE = 128
+
 
 def _pack_int24(n):
     return struct.pack("<I", n)[:3]
@@ -113,12 +121,15 @@ class Connection:
         (default: None - no timeout)
     :param str charset: Charset to use.
     :param str collation: Collation name to use.
+        When it is the server's default collation (from the handshake), it is
+        selected in the handshake and no "SET NAMES" is sent.
     :param sql_mode: Default SQL_MODE to use.
     :param read_default_file:
         Specifies  my.cnf file to read these parameters from under the [client] section.
     :param conv:
         Conversion dictionary to use instead of the default one.
         This is used to provide custom marshalling and unmarshalling of types.
+        A profile name from converters.profiles (e.g. "json") can be given instead.
         See converters.
     :param use_unicode:
         Whether or not to default to unicode strings.
@@ -151,6 +162,9 @@ class Connection:
         (if no authenticate method) for returning a string from the user. (experimental)
     :param server_public_key: SHA256 authentication plugin public key value. (default: None)
     :param binary_prefix: Add _binary prefix on bytes and bytearray. (default: False)
+    :param tracer: A callable which is called with a :class:`~pymysql.tracing.QueryTrace`
+        for every command sent to the server, e.g. :class:`~pymysql.tracing.LoggingTracer`.
+        (default: None - no instrumentation)
     :param compress: Not supported.
     :param named_pipe: Not supported.
     :param db: **DEPRECATED** Alias for database.
@@ -164,6 +178,8 @@ class Connection:
     _auth_plugin_name = ""
     _closed = False
     _secure = False
+    _tracer = None
+    _trace = None
 
     def __init__(
         self,
@@ -204,6 +220,7 @@ class Connection:
         ssl_key_password=None,
         ssl_verify_cert=None,
         ssl_verify_identity=None,
+        tracer=None,
         compress=None,  # not supported
         named_pipe=None,  # not supported
         passwd=None,  # deprecated
@@ -241,6 +258,8 @@ class Connection:
             if not read_default_group:
                 read_default_group = "client"
 
+            from .optionfile import Parser
+
             cfg = Parser()
             cfg.read(os.path.expanduser(read_default_file))
 
@@ -285,11 +304,12 @@ class Connection:
                 if ssl_key_password is not None:
                     ssl["password"] = ssl_key_password
             if ssl:
-                if not SSL_ENABLED:
+                try:
+                    self.ctx = self._create_ssl_ctx(ssl)
+                except ImportError:
                     raise NotImplementedError("ssl module not found")
                 self.ssl = True
                 client_flag |= CLIENT.SSL
-                self.ctx = self._create_ssl_ctx(ssl)
 
         self.host = host or "localhost"
         self.port = port or 3306
@@ -335,6 +355,11 @@ class Connection:
 
         if conv is None:
             conv = converters.conversions
+        elif isinstance(conv, str):
+            try:
+                conv = converters.profiles[conv]
+            except KeyError:
+                raise ValueError(f"unknown converter profile {conv!r}")
 
         # Need for MySQLdb compatibility.
         self.encoders = {k: v for (k, v) in conv.items() if type(k) is not int}
@@ -345,6 +370,8 @@ class Connection:
         self._auth_plugin_map = auth_plugin_map or {}
         self._binary_prefix = binary_prefix
         self.server_public_key = server_public_key
+        self._metadata_cache = {}
+        self._tracer = tracer
 
         self._connect_attrs = {
             "_client_name": "pymysql",
@@ -368,8 +395,36 @@ class Connection:
         self.close()
 
     def _create_ssl_ctx(self, sslp):
+        # ssl (like configparser and traceback) is imported on first use to
+        # keep it out of the cold start of processes not needing it.
+        import ssl
+
         if isinstance(sslp, ssl.SSLContext):
             return sslp
+        key = tuple(
+            sslp.get(k)
+            for k in (
+                "ca",
+                "capath",
+                "check_hostname",
+                "verify_mode",
+                "cert",
+                "key",
+                "password",
+                "cipher",
+            )
+        )
+        try:
+            ctx = _ssl_context_cache.get(key)
+        except TypeError:  # unhashable value; don't cache
+            return self._build_ssl_ctx(sslp)
+        if ctx is None:
+            ctx = _ssl_context_cache[key] = self._build_ssl_ctx(sslp)
+        return ctx
+
+    def _build_ssl_ctx(self, sslp):
+        import ssl
+
         ca = sslp.get("ca")
         capath = sslp.get("capath")
         hasnoca = ca is None and capath is None
@@ -413,6 +468,8 @@ class Connection:
         if self._closed:
             raise err.Error("Already closed")
         self._closed = True
+        if self._trace is not None:
+            self._finish_trace()
         if self._sock is None:
             return
         send_data = struct.pack("<iB", 1, COMMAND.COM_QUIT)
@@ -428,8 +485,13 @@ class Connection:
         """Return True if the connection is open."""
         return self._sock is not None
 
-    def _force_close(self):
-        """Close connection without QUIT message."""
+    def _force_close(self, error=None):
+        """Close connection without QUIT message.
+
+        A command still being traced is finished with *error*.
+        """
+        if self._trace is not None:
+            self._finish_trace(error or err.InterfaceError(0, "Connection closed"))
         if self._sock:
             try:
                 self._sock.close()
@@ -458,6 +520,8 @@ class Connection:
             )
         ok = OKPacketWrapper(pkt)
         self.server_status = ok.server_status
+        if self._trace is not None:
+            self._finish_trace()
         return ok
 
     def _send_autocommit_mode(self):
@@ -627,6 +691,8 @@ class Connection:
         self.charset = charset
         self.encoding = encoding
         self.collation = collation
+        # Cached metadata holds decoders for the previous encoding.
+        self._metadata_cache.clear()
 
     def connect(self, sock=None):
         self._closed = False
@@ -681,7 +747,11 @@ class Connection:
             # - https://github.com/PyMySQL/PyMySQL/issues/1092
             # - https://github.com/wagtail/wagtail/issues/9477
             # - https://zenn.dev/methane/articles/2023-mysql-collation (Japanese)
-            self.set_character_set(self.charset, self.collation)
+            #
+            # It is skipped only when an explicit collation was asked for and it
+            # is the server's default collation, selected in the handshake.
+            if self._server_collation() is None:
+                self.set_character_set(self.charset, self.collation)
 
             if self.sql_mode is not None:
                 c = self.cursor()
@@ -710,6 +780,8 @@ class Connection:
                 )
                 # Keep original exception and traceback to investigate error.
                 exc.original_exception = e
+                import traceback
+
                 exc.traceback = traceback.format_exc()
                 if DEBUG:
                     print(exc.traceback)
@@ -726,10 +798,13 @@ class Connection:
         """
         # Internal note: when you build packet manually and calls _write_bytes()
         # directly, you should set self._next_seq_id properly.
-        data = _pack_int24(len(payload)) + bytes([self._next_seq_id]) + payload
+        header = _pack_int24(len(payload)) + bytes([self._next_seq_id])
         if DEBUG:
-            dump_packet(data)
-        self._write_bytes(data)
+            dump_packet(header + payload)
+        if len(payload) < SCATTER_WRITE_SIZE:
+            self._write_bytes(header + payload)
+        else:
+            self._write_buffers([header, payload], 1)
         self._next_seq_id = (self._next_seq_id + 1) % 256
 
     def _read_packet(self, packet_type=MysqlPacket):
@@ -747,22 +822,26 @@ class Connection:
             btrl, btrh, packet_number = struct.unpack("<HBB", packet_header)
             bytes_to_read = btrl + (btrh << 16)
             if packet_number != self._next_seq_id:
-                self._force_close()
                 if packet_number == 0:
                     # MariaDB sends error packet with seqno==0 when shutdown
-                    raise err.OperationalError(
+                    error = err.OperationalError(
                         CR.CR_SERVER_LOST,
                         "Lost connection to MySQL server during query",
                     )
-                raise err.InternalError(
-                    "Packet sequence number wrong - got %d expected %d"
-                    % (packet_number, self._next_seq_id)
-                )
+                else:
+                    error = err.InternalError(
+                        "Packet sequence number wrong - got %d expected %d"
+                        % (packet_number, self._next_seq_id)
+                    )
+                self._force_close(error)
+                raise error
             self._next_seq_id = (self._next_seq_id + 1) % 256
 
             recv_data = self._read_bytes(bytes_to_read)
             if DEBUG:
                 dump_packet(recv_data)
+            if self._trace is not None:
+                self._trace_read(bytes_to_read + 4)
             buff += recv_data
             # https://dev.mysql.com/doc/internals/en/sending-more-than-16mbyte.html
             if bytes_to_read < MAX_PACKET_LEN:
@@ -772,7 +851,12 @@ class Connection:
         if packet.is_error_packet():
             if self._result is not None and self._result.unbuffered_active is True:
                 self._result.unbuffered_active = False
-            packet.raise_for_error()
+            try:
+                packet.raise_for_error()
+            except err.MySQLError as e:
+                if self._trace is not None:
+                    self._finish_trace(e)
+                raise
         return packet
 
     def _read_bytes(self, num_bytes):
@@ -784,20 +868,22 @@ class Connection:
             except OSError as e:
                 if e.errno == errno.EINTR:
                     continue
-                self._force_close()
-                raise err.OperationalError(
+                error = err.OperationalError(
                     CR.CR_SERVER_LOST,
                     f"Lost connection to MySQL server during query ({e})",
                 )
-            except BaseException:
+                self._force_close(error)
+                raise error
+            except BaseException as e:
                 # Don't convert unknown exception to MySQLError.
-                self._force_close()
+                self._force_close(e)
                 raise
         if len(data) < num_bytes:
-            self._force_close()
-            raise err.OperationalError(
+            error = err.OperationalError(
                 CR.CR_SERVER_LOST, "Lost connection to MySQL server during query"
             )
+            self._force_close(error)
+            raise error
         return data
 
     def _write_bytes(self, data):
@@ -805,27 +891,96 @@ class Connection:
         try:
             self._sock.sendall(data)
         except OSError as e:
-            self._force_close()
-            raise err.OperationalError(
+            error = err.OperationalError(
                 CR.CR_SERVER_GONE_ERROR, f"MySQL server has gone away ({e!r})"
             )
+            self._force_close(error)
+            raise error
+        if self._trace is not None:
+            self._trace.bytes_written += len(data)
+            self._trace.packets_written += 1
+
+    def _write_buffers(self, buffers, num_packets):
+        """Write a list of bytes-like objects without joining them.
+
+        Plain sockets use sendmsg() (one syscall for many buffers).
+        SSL sockets don't support it and get one sendall() per buffer.
+        """
+        sock = self._sock
+        sock.settimeout(self._write_timeout)
+        total = sum(len(b) for b in buffers)
+        ssl = sys.modules.get("ssl")  # no SSLSocket unless ssl was imported
+        try:
+            if not hasattr(sock, "sendmsg") or (
+                ssl is not None and isinstance(sock, ssl.SSLSocket)
+            ):
+                for buf in buffers:
+                    sock.sendall(buf)
+            else:
+                buffers = [memoryview(buf) for buf in buffers]
+                while buffers:
+                    sent = sock.sendmsg(buffers)
+                    # Drop what was sent; slicing a memoryview doesn't copy.
+                    while sent:
+                        if sent >= len(buffers[0]):
+                            sent -= len(buffers.pop(0))
+                        else:
+                            buffers[0] = buffers[0][sent:]
+                            sent = 0
+                    while buffers and not buffers[0]:
+                        buffers.pop(0)
+        except OSError as e:
+            error = err.OperationalError(
+                CR.CR_SERVER_GONE_ERROR, f"MySQL server has gone away ({e!r})"
+            )
+            self._force_close(error)
+            raise error
+        if self._trace is not None:
+            self._trace.bytes_written += total
+            self._trace.packets_written += num_packets
+
+    def _trace_read(self, num_bytes):
+        trace = self._trace
+        now = perf_counter()
+        if trace.first_byte is None:
+            trace.first_byte = now
+        trace.finished = now
+        trace.bytes_read += num_bytes
+        trace.packets_read += 1
+
+    def _finish_trace(self, error=None):
+        trace = self._trace
+        self._trace = None
+        trace.error = error
+        self._tracer(trace)
 
     def _read_query_result(self, unbuffered=False):
         self._result = None
-        if unbuffered:
-            try:
+        try:
+            if unbuffered:
+                try:
+                    result = UnbufferedResult(self)
+                    result.init_unbuffered_query()
+                except:
+                    result.unbuffered_active = False
+                    result.connection = None
+                    raise
+            else:
                 result = MySQLResult(self)
-                result.init_unbuffered_query()
-            except:
-                result.unbuffered_active = False
-                result.connection = None
-                raise
-        else:
-            result = MySQLResult(self)
-            result.read()
+                result.read()
+        except BaseException as e:
+            if self._trace is not None:
+                self._finish_trace(e)
+            raise
         self._result = result
         if result.server_status is not None:
             self.server_status = result.server_status
+        if (
+            self._trace is not None
+            and not result.unbuffered_active
+            and not result.has_next
+        ):
+            self._finish_trace()
         return result.affected_rows
 
     def insert_id(self):
@@ -849,43 +1004,82 @@ class Connection:
                 warnings.warn("Previous unbuffered result was left incomplete")
                 self._result._finish_unbuffered_query()
             while self._result.has_next:
-                self.next_result()
+                # Skip remaining result sets without decoding rows.
+                self.next_result(unbuffered=True)
+                self._result._finish_unbuffered_query()
             self._result = None
 
         if isinstance(sql, str):
             sql = sql.encode(self.encoding)
 
+        if self._tracer is not None:
+            if self._trace is not None:
+                self._finish_trace()
+            self._trace = QueryTrace(command, sql, perf_counter())
+
         packet_size = min(MAX_PACKET_LEN, len(sql) + 1)  # +1 is for command
 
         # tiny optimization: build first packet manually instead of
         # calling self..write_packet()
         prelude = struct.pack("<iB", packet_size, command)
-        packet = prelude + sql[: packet_size - 1]
-        self._write_bytes(packet)
-        if DEBUG:
-            dump_packet(packet)
-        self._next_seq_id = 1
-
-        if packet_size < MAX_PACKET_LEN:
+        if packet_size < MAX_PACKET_LEN and len(sql) < SCATTER_WRITE_SIZE:
+            packet = prelude + sql
+            self._write_bytes(packet)
+            if DEBUG:
+                dump_packet(packet)
+            self._next_seq_id = 1
+            if self._trace is not None:
+                self._trace.sent = perf_counter()
             return
 
-        sql = sql[packet_size - 1 :]
-        while True:
-            packet_size = min(MAX_PACKET_LEN, len(sql))
-            self.write_packet(sql[:packet_size])
-            sql = sql[packet_size:]
-            if not sql and packet_size < MAX_PACKET_LEN:
-                break
+        # Big statement: send headers and memoryview slices of sql so the
+        # statement is never copied, however many packets it is split into.
+        view = memoryview(sql)
+        buffers = [prelude, view[: packet_size - 1]]
+        if DEBUG:
+            dump_packet(prelude + sql[: packet_size - 1])
+        pos = packet_size - 1
+        seq_id = 1
+        while packet_size == MAX_PACKET_LEN:
+            packet_size = min(MAX_PACKET_LEN, len(sql) - pos)
+            buffers.append(_pack_int24(packet_size) + bytes([seq_id]))
+            buffers.append(view[pos : pos + packet_size])
+            pos += packet_size
+            seq_id = (seq_id + 1) % 256
+        self._write_buffers(buffers, len(buffers) // 2)
+        self._next_seq_id = seq_id
+        if self._trace is not None:
+            self._trace.sent = perf_counter()
+
+    def _server_collation(self):
+        """Return the server's default collation if it is the requested one.
+
+        Without an explicit collation there is no match: the default collation
+        of the charset (what "SET NAMES charset" selects) isn't known.
+        """
+        if not self.collation:
+            return None
+        try:
+            server = charset_by_id(getattr(self, "server_language", None))
+        except KeyError:
+            return None
+        if server.collation == self.collation.lower():
+            return server
+        return None
 
     def _request_authentication(self):
         # https://dev.mysql.com/doc/internals/en/connection-phase-packets.html#packet-Protocol::HandshakeResponse
         if int(self.server_version.split(".", 1)[0]) >= 5:
             self.client_flag |= CLIENT.MULTI_RESULTS
 
+        # Only use DEPRECATE_EOF when the server supports it too.
+        if not self.server_capabilities & CLIENT.DEPRECATE_EOF:
+            self.client_flag &= ~CLIENT.DEPRECATE_EOF
+
         if self.user is None:
             raise ValueError("Did not specify a username")
 
-        charset_id = charset_by_name(self.charset).id
+        charset_id = (self._server_collation() or charset_by_name(self.charset)).id
         if isinstance(self.user, str):
             self.user = self.user.encode(self.encoding)
 
@@ -896,10 +1090,22 @@ class Connection:
         if self.ssl and self.server_capabilities & CLIENT.SSL:
             self.write_packet(data_init)
 
-            self._sock = self.ctx.wrap_socket(self._sock, server_hostname=self.host)
+            # Resume the previous TLS session to this server to skip the full handshake.
+            cached = _ssl_session_cache.get((self.host, self.port))
+            session = cached[1] if cached and cached[0] is self.ctx else None
+            self._sock = self.ctx.wrap_socket(
+                self._sock, server_hostname=self.host, session=session
+            )
             self._rfile = self._sock.makefile("rb")
             self._secure = True
 
+        if not self.server_public_key:
+            # Taken out of the cache so a key that no longer works (e.g. the
+            # server key was rotated) is dropped when authentication fails.
+            self.server_public_key = _server_public_key_cache.pop(
+                (self.host, self.port), None
+            )
+
         data = data_init + self.user + b"\0"
 
         authresp = b""
@@ -987,6 +1193,15 @@ class Connection:
         if DEBUG:
             print("Succeed to auth")
 
+        if self.server_public_key:
+            _server_public_key_cache[(self.host, self.port)] = self.server_public_key
+        if self.ssl and self.server_capabilities & CLIENT.SSL:
+            # TLS 1.3 session tickets arrive after the handshake, so take the
+            # session once the auth result has been read.
+            session = self._sock.session
+            if session is not None:
+                _ssl_session_cache[(self.host, self.port)] = (self.ctx, session)
+
     def _process_auth(self, plugin_name, auth_packet):
         handler = self._get_auth_plugin_handler(plugin_name)
         if handler:
@@ -1174,6 +1389,23 @@ class Connection:
 
 
 class MySQLResult:
+    __slots__ = (
+        "connection",
+        "affected_rows",
+        "insert_id",
+        "server_status",
+        "warning_count",
+        "message",
+        "field_count",
+        "description",
+        "fields",
+        "converters",
+        "rows",
+        "has_next",
+        "unbuffered_active",
+        "_deprecate_eof",
+    )
+
     def __init__(self, connection):
         """
         :type connection: Connection
@@ -1189,10 +1421,7 @@ class MySQLResult:
         self.rows = None
         self.has_next = None
         self.unbuffered_active = False
-
-    def __del__(self):
-        if self.unbuffered_active:
-            self._finish_unbuffered_query()
+        self._deprecate_eof = bool(connection.client_flag & CLIENT.DEPRECATE_EOF)
 
     def read(self):
         try:
@@ -1265,14 +1494,14 @@ class MySQLResult:
         self._read_ok_packet(ok_packet)
 
     def _check_packet_is_eof(self, packet):
-        if not packet.is_eof_packet():
+        if self._deprecate_eof:
+            if not packet.is_ok_eof_packet():
+                return False
+            wp = OKPacketWrapper(packet)
+        elif packet.is_eof_packet():
+            wp = EOFPacketWrapper(packet)
+        else:
             return False
-        # TODO: Support CLIENT.DEPRECATE_EOF
-        # 1) Add DEPRECATE_EOF to CAPABILITIES
-        # 2) Mask CAPABILITIES with server_capabilities
-        # 3) if server_capabilities & CLIENT.DEPRECATE_EOF:
-        #    use OKPacketWrapper instead of EOFPacketWrapper
-        wp = EOFPacketWrapper(packet)
         self.warning_count = wp.warning_count
         self.has_next = wp.has_next
         return True
@@ -1288,14 +1517,24 @@ class MySQLResult:
             return
 
         # EOF
-        packet = self.connection._read_packet()
+        conn = self.connection
+        packet = conn._read_packet()
         if self._check_packet_is_eof(packet):
             self.unbuffered_active = False
             self.connection = None
             self.rows = None
+            if conn._trace is not None and not self.has_next:
+                conn._finish_trace()
             return
 
-        row = self._read_row_from_packet(packet)
+        trace = conn._trace
+        if trace is None:
+            row = self._read_row_from_packet(packet)
+        else:
+            start = perf_counter()
+            row = self._read_row_from_packet(packet)
+            trace.decode_time += perf_counter() - start
+            trace.rows += 1
         self.affected_rows = 1
         self.rows = (row,)  # rows should tuple of row for MySQL-python compatibility.
         return row
@@ -1304,9 +1543,10 @@ class MySQLResult:
         # After much reading on the MySQL protocol, it appears that there is,
         # in fact, no way to stop MySQL from sending all the data after
         # executing a query, so we just spin, and wait for an EOF packet.
+        conn = self.connection
         while self.unbuffered_active:
             try:
-                packet = self.connection._read_packet()
+                packet = conn._read_packet()
             except err.OperationalError as e:
                 if e.args[0] in (
                     ER.QUERY_TIMEOUT,
@@ -1322,17 +1562,28 @@ class MySQLResult:
             if self._check_packet_is_eof(packet):
                 self.unbuffered_active = False
                 self.connection = None  # release reference to kill cyclic reference.
+                if conn._trace is not None and not self.has_next:
+                    conn._finish_trace()
 
     def _read_rowdata_packet(self):
         """Read a rowdata packet for each data row in the result set."""
+        conn = self.connection
+        trace = conn._trace
         rows = []
         while True:
-            packet = self.connection._read_packet()
+            packet = conn._read_packet()
             if self._check_packet_is_eof(packet):
                 self.connection = None  # release reference to kill cyclic reference.
                 break
-            rows.append(self._read_row_from_packet(packet))
+            if trace is None:
+                rows.append(self._read_row_from_packet(packet))
+            else:
+                start = perf_counter()
+                rows.append(self._read_row_from_packet(packet))
+                trace.decode_time += perf_counter() - start
 
+        if trace is not None:
+            trace.rows += len(rows)
         self.affected_rows = len(rows)
         self.rows = tuple(rows)
 
@@ -1356,16 +1607,40 @@ class MySQLResult:
         return tuple(row)
 
     def _get_descriptions(self):
-        """Read a column descriptor packet for each column in the result."""
-        self.fields = []
-        self.converters = []
+        """Read a column descriptor packet for each column in the result.
+
+        Parsed metadata is cached on the connection, keyed by the raw column
+        definition packets, so repeating the same query doesn't parse them again.
+        """
+        conn = self.connection
+        raw = tuple(
+            conn._read_packet().get_all_data() for _ in range(self.field_count)
+        )
+        cache = conn._metadata_cache
+        metadata = cache.get(raw)
+        if metadata is None:
+            metadata = self._parse_descriptions(raw)
+            if METADATA_CACHE_SIZE:
+                if len(cache) >= METADATA_CACHE_SIZE:
+                    del cache[next(iter(cache))]
+                cache[raw] = metadata
+        self.fields, self.description, self.converters = metadata
+
+        if not self._deprecate_eof:
+            eof_packet = conn._read_packet()
+            assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
+
+    def _parse_descriptions(self, raw):
+        fields = []
+        field_converters = []
         use_unicode = self.connection.use_unicode
         conn_encoding = self.connection.encoding
+        decoders = self.connection.decoders
         description = []
 
-        for i in range(self.field_count):
-            field = self.connection._read_packet(FieldDescriptorPacket)
-            self.fields.append(field)
+        for data in raw:
+            field = FieldDescriptorPacket(data, conn_encoding)
+            fields.append(field)
             description.append(field.description())
             field_type = field.type_code
             if use_unicode:
@@ -1387,16 +1662,30 @@ class MySQLResult:
                     encoding = "ascii"
             else:
                 encoding = None
-            converter = self.connection.decoders.get(field_type)
+            converter = decoders.get(field_type)
+            if field_type == FIELD_TYPE.TINY and field.length == 1:
+                converter = decoders.get(converters.TINYINT1, converter)
             if converter is converters.through:
                 converter = None
             if DEBUG:
                 print(f"DEBUG: field={field}, converter={converter}")
-            self.converters.append((encoding, converter))
+            field_converters.append((encoding, converter))
+
+        return fields, tuple(description), field_converters
+
+
+class UnbufferedResult(MySQLResult):
+    """MySQLResult of an unbuffered query.
+
+    Only these need a finalizer: one dropped while rows are pending reads the
+    rest of them so the connection can be used again.
+    """
+
+    __slots__ = ()
 
-        eof_packet = self.connection._read_packet()
-        assert eof_packet.is_eof_packet(), "Protocol error, expecting EOF"
-        self.description = tuple(description)
+    def __del__(self):
+        if self.unbuffered_active:
+            self._finish_unbuffered_query()
 
 
 class LoadLocalFile:
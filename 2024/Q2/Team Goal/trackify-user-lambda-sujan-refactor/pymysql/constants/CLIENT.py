@@ -20,6 +20,7 @@ PS_MULTI_RESULTS = 1 << 18
 PLUGIN_AUTH = 1 << 19
 CONNECT_ATTRS = 1 << 20
 PLUGIN_AUTH_LENENC_CLIENT_DATA = 1 << 21
+DEPRECATE_EOF = 1 << 24
 CAPABILITIES = (
     LONG_PASSWORD
     | LONG_FLAG
@@ -30,9 +31,9 @@ CAPABILITIES = (
     | PLUGIN_AUTH
     | PLUGIN_AUTH_LENENC_CLIENT_DATA
     | CONNECT_ATTRS
+    | DEPRECATE_EOF
 )
 
 # Not done yet
 HANDLE_EXPIRED_PASSWORDS = 1 << 22
 SESSION_TRACK = 1 << 23
-DEPRECATE_EOF = 1 << 24
@@ -74,21 +74,37 @@ def escape_string(value, mapping=None):
 
     Value should be unicode
     """
-    return value.translate(_escape_table)
+    # Same result as value.translate(_escape_table), but most values (names,
+    # e-mail addresses, ...) contain none of these characters, and a few
+    # substring scans cost much less than translate() with multi-character
+    # replacements. Backslash must come first.
+    if "\\" in value:
+        value = value.replace("\\", "\\\\")
+    if "\0" in value:
+        value = value.replace("\0", "\\0")
+    if "\n" in value:
+        value = value.replace("\n", "\\n")
+    if "\r" in value:
+        value = value.replace("\r", "\\r")
+    if "\032" in value:
+        value = value.replace("\032", "\\Z")
+    if '"' in value:
+        value = value.replace('"', '\\"')
+    if "'" in value:
+        value = value.replace("'", "\\'")
+    return value
 
 
 def escape_bytes_prefixed(value, mapping=None):
-    return "_binary'%s'" % value.decode("ascii", "surrogateescape").translate(
-        _escape_table
-    )
+    return "_binary'%s'" % escape_string(value.decode("ascii", "surrogateescape"))
 
 
 def escape_bytes(value, mapping=None):
-    return "'%s'" % value.decode("ascii", "surrogateescape").translate(_escape_table)
+    return "'%s'" % escape_string(value.decode("ascii", "surrogateescape"))
 
 
 def escape_str(value, mapping=None):
-    return "'%s'" % escape_string(str(value), mapping)
+    return "'%s'" % escape_string(str(value))
 
 
 def escape_None(value, mapping=None):
@@ -360,4 +376,76 @@ conversions = encoders.copy()
 conversions.update(decoders)
 Thing2Literal = escape_str
 
+
+#: Pseudo field type for TINYINT(1) columns. A decoder registered for it
+#: is used instead of the FIELD_TYPE.TINY one for those columns.
+TINYINT1 = -1
+
+
+def convert_tinyint1(obj):
+    """Returns a TINYINT(1) column value as a bool:
+
+      >>> convert_tinyint1('0'), convert_tinyint1('1'), convert_tinyint1(b'0')
+      (False, True, False)
+    """
+    return obj not in ("0", b"0")
+
+
+def convert_datetime_text(obj):
+    """Returns a DATETIME or TIMESTAMP column value as the text ``str()`` gives
+    for the default profile's value, building a datetime only for fractional
+    seconds:
+
+      >>> convert_datetime_text('2007-02-25 23:06:20')
+      '2007-02-25 23:06:20'
+      >>> convert_datetime_text('2007-02-25 23:06:20.123')
+      '2007-02-25 23:06:20.123000'
+      >>> convert_datetime_text('2007-02-25 23:06:20.000000')
+      '2007-02-25 23:06:20'
+      >>> convert_datetime_text('0000-00-00 00:00:00.000')
+      '0000-00-00 00:00:00.000'
+    """
+    if isinstance(obj, (bytes, bytearray)):
+        obj = obj.decode("ascii")
+
+    if "." not in obj:
+        return obj
+    return str(convert_datetime(obj))
+
+
+# Converter profiles, usable by name as ``Connection(conv=...)``.
+
+#: Values ``json.dumps(default=str)`` serializes exactly like the default
+#: profile, without building Decimal and date objects: DECIMAL and DATE are
+#: kept as the text sent by the server, DATETIME and TIMESTAMP too unless
+#: they have fractional seconds.
+json_conversions = conversions.copy()
+json_conversions.update(
+    {
+        FIELD_TYPE.DECIMAL: through,
+        FIELD_TYPE.NEWDECIMAL: through,
+        FIELD_TYPE.DATE: through,
+        FIELD_TYPE.DATETIME: convert_datetime_text,
+        FIELD_TYPE.TIMESTAMP: convert_datetime_text,
+    }
+)
+
+#: Values native to JSON: DECIMAL as float (may lose precision), TIME as
+#: 'HH:MM:SS' text and TINYINT(1) as bool.
+json_fast_conversions = json_conversions.copy()
+json_fast_conversions.update(
+    {
+        FIELD_TYPE.DECIMAL: float,
+        FIELD_TYPE.NEWDECIMAL: float,
+        FIELD_TYPE.TIME: through,
+        TINYINT1: convert_tinyint1,
+    }
+)
+
+profiles = {
+    "default": conversions,
+    "json": json_conversions,
+    "json-fast": json_fast_conversions,
+}
+
 # Run doctests with `pytest --doctest-modules pymysql/converters.py`
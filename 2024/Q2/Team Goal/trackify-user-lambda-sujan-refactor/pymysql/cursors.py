@@ -1,6 +1,7 @@
 import re
 import warnings
 from . import err
+from .constants import CLIENT
 
 
 #: Regular expression for :meth:`Cursor.executemany`.
@@ -50,8 +51,7 @@ class Cursor:
         if conn is None:
             return
         try:
-            while self.nextset():
-                pass
+            self._skip_sets()
         finally:
             self.connection = None
 
@@ -97,6 +97,52 @@ class Cursor:
     def nextset(self):
         return self._nextset(False)
 
+    def _skip_sets(self):
+        """Discard the remaining result sets without decoding their rows."""
+        while self._nextset(unbuffered=True):
+            self._result._finish_unbuffered_query()
+
+    def _advance_set(self, skip=False):
+        result = self._result
+        if result is not None and result.unbuffered_active:
+            result._finish_unbuffered_query()
+        if not skip:
+            return self.nextset()
+        if not self._nextset(unbuffered=True):
+            return None
+        self._result._finish_unbuffered_query()
+        return True
+
+    def _set_rows(self):
+        return tuple(self.fetchall())
+
+    def iter_sets(self, wanted=None):
+        """Iterate over the result sets of the last query, e.g. of a stored procedure.
+
+        :param wanted: Indexes (from 0) of the result sets to return. Rows of
+            the other result sets are read from the network and dropped
+            without being decoded. (optional)
+        :type wanted: set
+
+        :return: Generator of ``(index, rows)`` tuples, starting with the current
+            result set. Only one result set is held at a time. *rows* is a tuple,
+            empty for results without rows like the trailing OK of a CALL. With an
+            unbuffered cursor, *rows* is an iterator which must be used before
+            the next step.
+
+        A buffered cursor has already read and decoded the current result set
+        (set 0 right after :meth:`execute`), so *wanted* only saves decoding the
+        sets after it. An unbuffered cursor drops set 0 undecoded too.
+        """
+        self._check_executed()
+        index = 0
+        while True:
+            if wanted is None or index in wanted:
+                yield index, self._set_rows()
+            index += 1
+            if not self._advance_set(skip=wanted is not None and index not in wanted):
+                return
+
     def _escape_args(self, args, conn):
         if isinstance(args, (tuple, list)):
             return tuple(conn.literal(arg) for arg in args)
@@ -145,8 +191,7 @@ class Cursor:
         If args is a list or tuple, %s can be used as a placeholder in the query.
         If args is a dict, %(name)s can be used as a placeholder in the query.
         """
-        while self.nextset():
-            pass
+        self._skip_sets()
 
         query = self.mogrify(query, args)
 
@@ -212,12 +257,14 @@ class Cursor:
             if isinstance(v, str):
                 v = v.encode(encoding, "surrogateescape")
             if len(sql) + len(v) + len(postfix) + 1 > max_stmt_length:
-                rows += self.execute(sql + postfix)
+                sql += postfix
+                rows += self.execute(sql)
                 sql = bytearray(prefix)
             else:
                 sql += b","
             sql += v
-        rows += self.execute(sql + postfix)
+        sql += postfix
+        rows += self.execute(sql)
         self.rowcount = rows
         return rows
 
@@ -252,20 +299,25 @@ class Cursor:
         disconnected.
         """
         conn = self._get_db()
+        q = "CALL {}({})".format(
+            procname,
+            ",".join(["@_%s_%d" % (procname, i) for i in range(len(args))]),
+        )
         if args:
             fmt = f"@_{procname}_%d=%s"
-            self._query(
-                "SET %s"
-                % ",".join(
-                    fmt % (index, conn.escape(arg)) for index, arg in enumerate(args)
-                )
+            set_q = "SET %s" % ",".join(
+                fmt % (index, conn.escape(arg)) for index, arg in enumerate(args)
             )
+            if conn.client_flag & CLIENT.MULTI_STATEMENTS:
+                # Send both statements in one round trip and step over the
+                # result of SET.
+                self._query(set_q + ";" + q)
+                self.nextset()
+                self._executed = q
+                return args
+            self._query(set_q)
             self.nextset()
 
-        q = "CALL {}({})".format(
-            procname,
-            ",".join(["@_%s_%d" % (procname, i) for i in range(len(args))]),
-        )
         self._query(q)
         self._executed = q
         return args
@@ -434,8 +486,7 @@ class SSCursor(Cursor):
             self._result._finish_unbuffered_query()
 
         try:
-            while self.nextset():
-                pass
+            self._skip_sets()
         finally:
             self.connection = None
 
@@ -451,6 +502,9 @@ class SSCursor(Cursor):
     def nextset(self):
         return self._nextset(unbuffered=True)
 
+    def _set_rows(self):
+        return self.fetchall_unbuffered()
+
     def read_next(self):
         """Read next row."""
         return self._conv_row(self._result._read_rowdata_packet_unbuffered())
@@ -0,0 +1,176 @@
+"""
+Stream query results into Arrow IPC or Parquet files.
+
+Rows are read with an unbuffered cursor and written in batches, so the
+whole result is never held in memory. Column types come from the result's
+column definitions. Requires the ``pyarrow`` package::
+
+    export_query(conn, "SELECT * FROM users", "users.parquet")
+"""
+
+import os
+from decimal import Decimal
+
+from . import converters, err
+from .constants import FIELD_TYPE, FLAG
+from .cursors import SSCursor
+
+#: Rows per record batch (and Parquet row group).
+BATCH_ROWS = 16384
+
+_FORMATS = {
+    ".arrow": "arrow",
+    ".ipc": "arrow",
+    ".feather": "arrow",
+    ".parquet": "parquet",
+}
+
+_TEXT_TYPES = {
+    FIELD_TYPE.VARCHAR,
+    FIELD_TYPE.VAR_STRING,
+    FIELD_TYPE.STRING,
+    FIELD_TYPE.TINY_BLOB,
+    FIELD_TYPE.MEDIUM_BLOB,
+    FIELD_TYPE.LONG_BLOB,
+    FIELD_TYPE.BLOB,
+    FIELD_TYPE.ENUM,
+    FIELD_TYPE.SET,
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("'pyarrow' package is required for exporting results")
+    return pyarrow
+
+
+def arrow_type(field):
+    """Return the pyarrow type for a :class:`~pymysql.protocol.FieldDescriptorPacket`."""
+    pa = _import_pyarrow()
+    type_code = field.type_code
+    unsigned = field.flags & FLAG.UNSIGNED
+    if type_code == FIELD_TYPE.TINY:
+        return pa.uint8() if unsigned else pa.int8()
+    if type_code in (FIELD_TYPE.SHORT, FIELD_TYPE.YEAR):
+        return pa.uint16() if unsigned else pa.int16()
+    if type_code in (FIELD_TYPE.INT24, FIELD_TYPE.LONG):
+        return pa.uint32() if unsigned else pa.int32()
+    if type_code == FIELD_TYPE.LONGLONG:
+        return pa.uint64() if unsigned else pa.int64()
+    if type_code == FIELD_TYPE.FLOAT:
+        return pa.float32()
+    if type_code == FIELD_TYPE.DOUBLE:
+        return pa.float64()
+    if type_code in (FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL):
+        # The column length counts the sign and the decimal point.
+        precision = field.length - (field.scale > 0) - (not unsigned)
+        precision = max(precision, field.scale, 1)
+        if precision > 38:
+            return pa.decimal256(precision, field.scale)
+        return pa.decimal128(precision, field.scale)
+    if type_code in (FIELD_TYPE.DATE, FIELD_TYPE.NEWDATE):
+        return pa.date32()
+    if type_code in (FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP):
+        return pa.timestamp("us")
+    if type_code == FIELD_TYPE.TIME:
+        return pa.duration("us")
+    if type_code == FIELD_TYPE.NULL:
+        return pa.null()
+    if type_code == FIELD_TYPE.JSON:
+        return pa.string()
+    if type_code in _TEXT_TYPES and field.charsetnr != 63:
+        return pa.string()
+    # BIT, GEOMETRY and binary strings
+    return pa.binary()
+
+
+def arrow_schema(fields):
+    """Return the pyarrow schema of a result's column definitions."""
+    pa = _import_pyarrow()
+    return pa.schema([pa.field(field.name, arrow_type(field)) for field in fields])
+
+
+def _parser(pa, type):
+    """Return the converter turning the str values of a *type* column into its
+    Python type, or None for columns where str is expected."""
+    if pa.types.is_date(type):
+        return converters.convert_date
+    if pa.types.is_timestamp(type):
+        return converters.convert_datetime
+    if pa.types.is_duration(type):
+        return converters.convert_timedelta
+    if pa.types.is_decimal(type):
+        return Decimal
+    return None
+
+
+def _to_array(pa, values, type):
+    try:
+        return pa.array(values, type=type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    # Connections using a converter profile like "json" return dates and
+    # decimals as str (or float). Values the converters leave as str, like
+    # zero dates ('0000-00-00') and other out of range dates, are stored as null.
+    parse = _parser(pa, type)
+    if parse is not None:
+        values = [_parse(parse, v) if isinstance(v, str) else v for v in values]
+    try:
+        return pa.array(values, type=type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. DECIMAL as float with the "json-fast" profile
+        return pa.array(values).cast(type)
+
+
+def _parse(parse, value):
+    value = parse(value)
+    return None if isinstance(value, str) else value
+
+
+def export_query(conn, sql, path, args=None, format=None, batch_rows=BATCH_ROWS):
+    """Run *sql* and write its rows to *path*.
+
+    :param conn: Connection to run the query on.
+    :param sql: Query, with placeholders for *args* like ``Cursor.execute()``.
+    :param path: File to write.
+    :param args: Query parameters.
+    :param format: ``"arrow"`` (Arrow IPC file) or ``"parquet"``.
+        (default: guessed from the file extension, else arrow)
+    :param batch_rows: Rows per record batch / Parquet row group.
+    :return: Number of rows written.
+    :raise ProgrammingError: If *sql* doesn't return a result set.
+    """
+    pa = _import_pyarrow()
+    if format is None:
+        format = _FORMATS.get(os.path.splitext(path)[1].lower(), "arrow")
+    if format not in ("arrow", "parquet"):
+        raise ValueError(f"unknown export format {format!r}")
+
+    with conn.cursor(SSCursor) as cursor:
+        cursor.execute(sql, args)
+        if cursor.description is None:
+            raise err.ProgrammingError("statement returned no result set")
+        schema = arrow_schema(cursor._result.fields)
+        if format == "parquet":
+            import pyarrow.parquet
+
+            writer = pyarrow.parquet.ParquetWriter(path, schema)
+        else:
+            writer = pa.ipc.new_file(path, schema)
+
+        total = 0
+        with writer:
+            while True:
+                rows = cursor.fetchmany(batch_rows)
+                if not rows:
+                    break
+                columns = zip(*rows)
+                arrays = [
+                    _to_array(pa, list(values), field.type)
+                    for values, field in zip(columns, schema)
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                total += len(rows)
+        return total
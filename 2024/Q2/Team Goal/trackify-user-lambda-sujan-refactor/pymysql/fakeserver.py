@@ -0,0 +1,513 @@
+"""
+In-process fake MySQL server for benchmarks and tests without a real server.
+
+:class:`FakeServer` answers every SELECT with a synthesized result set of
+configurable width and row count, or replays sessions recorded from a real
+server with :class:`Recorder`::
+
+    with FakeServer(columns=20, rows=10000) as server:
+        conn = pymysql.connect(**server.connect_args)
+
+Recording a real server (plain text connections only, use ``ssl_disabled=True``)::
+
+    python -m pymysql.fakeserver db.example.com:3306 session.jsonl --listen 3307
+"""
+
+import argparse
+import base64
+import json
+import socket
+import struct
+import threading
+
+from .constants import CLIENT, COMMAND, ER, FIELD_TYPE, SERVER_STATUS
+from .connections import MAX_PACKET_LEN, _lenenc_int, _pack_int24
+from .protocol import MysqlPacket
+
+SERVER_CAPABILITIES = (
+    CLIENT.CAPABILITIES
+    | CLIENT.FOUND_ROWS
+    | CLIENT.CONNECT_WITH_DB
+    | CLIENT.MULTI_STATEMENTS
+    | CLIENT.LOCAL_FILES
+)
+
+#: Text protocol value sent for each column type, unless given explicitly.
+SAMPLE_VALUES = {
+    FIELD_TYPE.TINY: b"1",
+    FIELD_TYPE.SHORT: b"1234",
+    FIELD_TYPE.INT24: b"123456",
+    FIELD_TYPE.LONG: b"12345678",
+    FIELD_TYPE.LONGLONG: b"1234567890123",
+    FIELD_TYPE.FLOAT: b"1.5",
+    FIELD_TYPE.DOUBLE: b"3.14159",
+    FIELD_TYPE.DECIMAL: b"1234.50",
+    FIELD_TYPE.NEWDECIMAL: b"1234.50",
+    FIELD_TYPE.YEAR: b"2024",
+    FIELD_TYPE.DATE: b"2024-01-02",
+    FIELD_TYPE.TIME: b"08:30:00",
+    FIELD_TYPE.DATETIME: b"2024-01-02 03:04:05",
+    FIELD_TYPE.TIMESTAMP: b"2024-01-02 03:04:05",
+    FIELD_TYPE.JSON: b'{"key": "value"}',
+}
+
+# Column length and character set of the column definitions.
+_TEXT_TYPES = {
+    FIELD_TYPE.VAR_STRING,
+    FIELD_TYPE.STRING,
+    FIELD_TYPE.VARCHAR,
+    FIELD_TYPE.BLOB,
+    FIELD_TYPE.JSON,
+}
+
+
+def _packet(seq_id, payload):
+    return _pack_int24(len(payload)) + bytes([seq_id % 256]) + payload
+
+
+def _lenenc_str(s):
+    if isinstance(s, str):
+        s = s.encode()
+    return _lenenc_int(len(s)) + s
+
+
+def _recv_exactly(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def _recv_packet(sock):
+    """Read one (possibly split) packet. Returns (raw bytes, seq_id, payload) or None on EOF."""
+    raw = bytearray()
+    payload = bytearray()
+    while True:
+        header = _recv_exactly(sock, 4)
+        if header is None:
+            return None
+        length = header[0] | header[1] << 8 | header[2] << 16
+        data = _recv_exactly(sock, length) if length else b""
+        if data is None:
+            return None
+        raw += header + data
+        payload += data
+        if length < MAX_PACKET_LEN:
+            return bytes(raw), header[3], bytes(payload)
+
+
+class FakeServer:
+    """MySQL server running in background threads on a local port.
+
+    Authentication always succeeds (mysql_native_password, any password).
+    In synthesizing mode a statement starting with SELECT or SHOW gets a
+    result set; everything else gets an OK packet.
+
+    :param columns: Number of VARCHAR columns, or a list of ``(name, field_type)``
+        or ``(name, field_type, length)``, e.g. length 1 for TINYINT(1).
+        (default: 4)
+    :param rows: Number of rows of each result set. (default: 1)
+    :param values: Row to send, one bytes/str/None per column.
+        (default: :data:`SAMPLE_VALUES` of the column types)
+    :param replay: Recording file made by :class:`Recorder`, or list of sessions
+        from :func:`load_recording`. The Nth connection replays session N
+        (wrapping around); *columns*, *rows* and *values* are ignored.
+    :param deprecate_eof: Announce CLIENT.DEPRECATE_EOF. (default: True)
+    :param call_sets: Number of result sets a CALL statement returns before its
+        OK packet, the Nth of them with N rows. (default: 0)
+    :param errors: Statements starting with one of these (bytes, case sensitive)
+        get an ER_PARSE_ERROR error packet instead of a result.
+    :param collation_id: Server collation in the handshake. (default: 255)
+    :param server_version: Version string in the handshake.
+    :param host: Address to listen on. (default: "127.0.0.1")
+    :param port: Port to listen on. (default: 0 - any free port)
+
+    Statements received are appended to :attr:`queries`.
+    """
+
+    def __init__(
+        self,
+        columns=4,
+        rows=1,
+        values=None,
+        *,
+        replay=None,
+        deprecate_eof=True,
+        call_sets=0,
+        errors=(),
+        collation_id=255,
+        server_version="8.0.36-fake",
+        host="127.0.0.1",
+        port=0,
+    ):
+        if isinstance(columns, int):
+            columns = [(f"col{i}", FIELD_TYPE.VAR_STRING) for i in range(columns)]
+        self.columns = [(c[0], c[1]) for c in columns]
+        self.lengths = [c[2] if len(c) > 2 else None for c in columns]
+        if values is None:
+            values = [
+                SAMPLE_VALUES.get(field_type, f"{name}-value".encode())
+                for name, field_type in self.columns
+            ]
+        if len(values) != len(self.columns):
+            raise ValueError("values must have one item per column")
+        self.values = values
+        self.rows = rows
+        if isinstance(replay, str):
+            replay = load_recording(replay)
+        self.sessions = replay
+        self.capabilities = SERVER_CAPABILITIES
+        if not deprecate_eof:
+            self.capabilities &= ~CLIENT.DEPRECATE_EOF
+        self.call_sets = call_sets
+        self.errors = tuple(errors)
+        self.collation_id = collation_id
+        self.server_version = server_version
+        self.queries = []
+        self._num_connections = 0
+        self._result_cache = {}
+        self._lock = threading.Lock()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(16)
+        self.host, self.port = self._sock.getsockname()[:2]
+        self._thread = threading.Thread(
+            target=self._serve, name="pymysql-fakeserver", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        del exc_info
+        self.close()
+
+    @property
+    def connect_args(self):
+        """Keyword arguments for :func:`pymysql.connect` reaching this server."""
+        return {"host": self.host, "port": self.port, "user": "fake", "password": ""}
+
+    def close(self):
+        """Stop accepting connections."""
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                index = self._num_connections
+                self._num_connections += 1
+            if self.sessions is not None:
+                target = self._replay
+                args = (client, self.sessions[index % len(self.sessions)])
+            else:
+                target = self._synthesize
+                args = (client, index + 1)
+            threading.Thread(target=target, args=args, daemon=True).start()
+
+    def _replay(self, client, session):
+        with client:
+            for direction, data in session:
+                if direction == "server":
+                    client.sendall(data)
+                    continue
+                packet = _recv_packet(client)
+                if packet is None:
+                    return
+                payload = packet[2]
+                if payload[:1] == bytes([COMMAND.COM_QUERY]):
+                    self.queries.append(payload[1:])
+            # Wait for COM_QUIT or the client closing the socket.
+            _recv_packet(client)
+
+    def _synthesize(self, client, connection_id):
+        with client:
+            client.sendall(_packet(0, self._handshake(connection_id)))
+            packet = _recv_packet(client)
+            if packet is None:
+                return
+            _, seq_id, payload = packet
+            client_flag = MysqlPacket(payload, "utf8").read_uint32()
+            deprecate_eof = bool(client_flag & self.capabilities & CLIENT.DEPRECATE_EOF)
+            client.sendall(_packet(seq_id + 1, self._ok()))
+            while True:
+                packet = _recv_packet(client)
+                if packet is None:
+                    return
+                _, seq_id, payload = packet
+                command = payload[0]
+                if command == COMMAND.COM_QUIT:
+                    return
+                if command == COMMAND.COM_QUERY:
+                    sql = payload[1:]
+                    self.queries.append(sql)
+                    if self.errors and sql.startswith(self.errors):
+                        client.sendall(_packet(seq_id + 1, self._error(sql)))
+                        continue
+                    verb = sql.lstrip()[:6].upper()
+                    if verb.startswith((b"SELECT", b"SHOW")):
+                        client.sendall(self._result_set(seq_id + 1, deprecate_eof))
+                        continue
+                    if verb.startswith(b"CALL") and self.call_sets:
+                        client.sendall(self._call_result(seq_id + 1, deprecate_eof))
+                        continue
+                client.sendall(_packet(seq_id + 1, self._ok()))
+
+    def _handshake(self, connection_id):
+        salt = b"0123456789abcdefghij"
+        caps = self.capabilities
+        return (
+            b"\x0a"
+            + self.server_version.encode()
+            + b"\0"
+            + struct.pack("<I", connection_id)
+            + salt[:8]
+            + b"\0"
+            + struct.pack("<H", caps & 0xFFFF)
+            + struct.pack(
+                "<BHHB",
+                self.collation_id,
+                SERVER_STATUS.SERVER_STATUS_AUTOCOMMIT,
+                caps >> 16,
+                len(salt) + 1,
+            )
+            + b"\0" * 10
+            + salt[8:]
+            + b"\0"
+            + b"mysql_native_password\0"
+        )
+
+    def _ok(self, header=b"\0", status=SERVER_STATUS.SERVER_STATUS_AUTOCOMMIT):
+        return header + _lenenc_int(0) + _lenenc_int(0) + struct.pack("<HH", status, 0)
+
+    def _result_set(self, seq_id, deprecate_eof):
+        # Every result set is the same, so it's built once and sent as one blob.
+        key = (seq_id, deprecate_eof)
+        data = self._result_cache.get(key)
+        if data is not None:
+            return data
+
+        packets = self._result_set_packets(deprecate_eof, self.rows)
+        data = b"".join(
+            _packet(seq_id + i, payload) for i, payload in enumerate(packets)
+        )
+        self._result_cache[key] = data
+        return data
+
+    def _call_result(self, seq_id, deprecate_eof):
+        # A stored procedure's result sets, then the OK packet of the CALL.
+        packets = []
+        for n in range(1, self.call_sets + 1):
+            packets += self._result_set_packets(deprecate_eof, n, more_results=True)
+        packets.append(self._ok())
+        return b"".join(
+            _packet(seq_id + i, payload) for i, payload in enumerate(packets)
+        )
+
+    def _result_set_packets(self, deprecate_eof, rows, more_results=False):
+        status = SERVER_STATUS.SERVER_STATUS_AUTOCOMMIT
+        if more_results:
+            status |= SERVER_STATUS.SERVER_MORE_RESULTS_EXISTS
+        packets = [_lenenc_int(len(self.columns))]
+        columns = zip(self.columns, self.lengths, self.values)
+        for (name, field_type), column_length, value in columns:
+            scale = 0
+            if field_type in _TEXT_TYPES:
+                charset, length = 255, 1020
+            elif field_type in (FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL):
+                # Precision and scale of the sample value, like DECIMAL(6,2).
+                if isinstance(value, str):
+                    value = value.encode()
+                charset, length = 63, len(value or b"0") + 1
+                if value and b"." in value:
+                    scale = len(value) - value.index(b".") - 1
+            else:
+                charset, length = 63, 20
+            if column_length is not None:
+                length = column_length
+            packets.append(
+                _lenenc_str("def")
+                + _lenenc_str("fake")
+                + _lenenc_str("t")
+                + _lenenc_str("t")
+                + _lenenc_str(name)
+                + _lenenc_str(name)
+                + b"\x0c"
+                + struct.pack("<HIBHB", charset, length, field_type, 0, scale)
+                + b"\0\0"
+            )
+        if not deprecate_eof:
+            packets.append(self._eof())
+        row = b"".join(
+            b"\xfb" if value is None else _lenenc_str(value) for value in self.values
+        )
+        packets.extend([row] * rows)
+        if deprecate_eof:
+            packets.append(self._ok(b"\xfe", status))
+        else:
+            packets.append(self._eof(status))
+        return packets
+
+    def _error(self, sql):
+        message = b"You have an error in your SQL syntax near '" + sql[:40] + b"'"
+        return b"\xff" + struct.pack("<H", ER.PARSE_ERROR) + b"#42000" + message
+
+    def _eof(self, status=SERVER_STATUS.SERVER_STATUS_AUTOCOMMIT):
+        return b"\xfe" + struct.pack("<HH", 0, status)
+
+
+def load_recording(path):
+    """Load a file written by :class:`Recorder`.
+
+    Returns a list of sessions, each a list of ``(direction, bytes)`` with
+    direction "client" or "server". Consecutive server packets are joined.
+    """
+    sessions = {}
+    with open(path) as f:
+        for line in f:
+            event = json.loads(line)
+            session = sessions.setdefault(event["session"], [])
+            data = base64.b64decode(event["data"])
+            if event["from"] == "server" and session and session[-1][0] == "server":
+                session[-1] = ("server", session[-1][1] + data)
+            else:
+                session.append((event["from"], data))
+    return [sessions[key] for key in sorted(sessions)]
+
+
+class Recorder:
+    """Proxy between clients and a real server, recording all packets to a file.
+
+    The file has one JSON object per packet and can be replayed with
+    ``FakeServer(replay=path)``. TLS connections can't be recorded, so clients
+    must connect with ``ssl_disabled=True``.
+
+    :param upstream: ``(host, port)`` of the real server.
+    :param path: File to write.
+    :param host: Address to listen on. (default: "127.0.0.1")
+    :param port: Port to listen on. (default: 0 - any free port)
+    """
+
+    def __init__(self, upstream, path, host="127.0.0.1", port=0):
+        self.upstream = upstream
+        self._file = open(path, "w")
+        self._lock = threading.Lock()
+        self._num_sessions = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(16)
+        self.host, self.port = self._sock.getsockname()[:2]
+        self._thread = threading.Thread(
+            target=self._serve, name="pymysql-recorder", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        del exc_info
+        self.close()
+
+    def close(self):
+        """Stop accepting connections and close the file."""
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        with self._lock:
+            self._file.close()
+
+    def serve_forever(self):
+        self._thread.join()
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            try:
+                server = socket.create_connection(self.upstream)
+            except OSError:
+                client.close()
+                continue
+            for sock in (client, server):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                session = self._num_sessions
+                self._num_sessions += 1
+            for src, dst, direction in (
+                (client, server, "client"),
+                (server, client, "server"),
+            ):
+                threading.Thread(
+                    target=self._pump,
+                    args=(src, dst, session, direction),
+                    daemon=True,
+                ).start()
+
+    def _pump(self, src, dst, session, direction):
+        try:
+            while True:
+                packet = _recv_packet(src)
+                if packet is None:
+                    break
+                self._record(session, direction, packet[0])
+                dst.sendall(packet[0])
+        except OSError:
+            pass
+        finally:
+            for sock in (src, dst):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def _record(self, session, direction, data):
+        event = {
+            "session": session,
+            "from": direction,
+            "data": base64.b64encode(data).decode("ascii"),
+        }
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(json.dumps(event) + "\n")
+                self._file.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pymysql.fakeserver",
+        description="Record MySQL sessions for replaying with FakeServer.",
+    )
+    parser.add_argument("upstream", help="host:port of the real server")
+    parser.add_argument("output", help="recording file to write")
+    parser.add_argument("--listen", type=int, default=3307, help="local port")
+    args = parser.parse_args(argv)
+    host, _, port = args.upstream.rpartition(":")
+    recorder = Recorder((host, int(port)), args.output, port=args.listen)
+    print(f"Recording {args.upstream} on {recorder.host}:{recorder.port}")
+    try:
+        recorder.serve_forever()
+    except KeyboardInterrupt:
+        recorder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,9 @@ UNSIGNED_SHORT_COLUMN = 252
 UNSIGNED_INT24_COLUMN = 253
 UNSIGNED_INT64_COLUMN = 254
 
+# charsetnr, length, type_code, flags, scale of a column definition.
+_FIELD_DESCRIPTOR = struct.Struct("<xHIBHBxx")
+
 
 def dump_packet(data):  # pragma: no cover
     def printable(data):
@@ -188,6 +191,13 @@ class MysqlPacket:
         # If \xFE is LengthEncodedInteger header, 8bytes followed.
         return self._data[0] == 0xFE and len(self._data) < 9
 
+    def is_ok_eof_packet(self):
+        # https://dev.mysql.com/doc/dev/mysql-server/latest/page_protocol_basic_ok_packet.html
+        # With CLIENT_DEPRECATE_EOF, result sets are terminated by an OK packet
+        # with \xFE header. A row starting with a \xFE LengthEncodedInteger
+        # can't be shorter than 16MB, so the payload length tells them apart.
+        return self._data[0] == 0xFE and 7 <= len(self._data) < 0xFFFFFF
+
     def is_auth_switch_request(self):
         # http://dev.mysql.com/doc/internals/en/connection-phase-packets.html#packet-Protocol::AuthSwitchRequest
         return self._data[0] == 0xFE
@@ -229,6 +239,21 @@ class FieldDescriptorPacket(MysqlPacket):
     attributes on the class such as: db, table_name, name, length, type_code.
     """
 
+    __slots__ = (
+        "_encoding",
+        "_catalog_at",
+        "_db_at",
+        "_org_table_at",
+        "_org_name_at",
+        "table_name",
+        "name",
+        "charsetnr",
+        "length",
+        "type_code",
+        "flags",
+        "scale",
+    )
+
     def __init__(self, data, encoding):
         MysqlPacket.__init__(self, data, encoding)
         self._parse_field_descriptor(encoding)
@@ -237,23 +262,59 @@ class FieldDescriptorPacket(MysqlPacket):
         """Parse the 'Field Descriptor' (Metadata) packet.
 
         This is compatible with MySQL 4.1+ (not compatible with MySQL 4.0).
+
+        catalog, db, org_table and org_name are rarely used, so only their
+        positions are kept and they are read when accessed.
         """
-        self.catalog = self.read_length_coded_string()
-        self.db = self.read_length_coded_string()
+        self._encoding = encoding
+        self._catalog_at = self._skip_length_coded_string()
+        self._db_at = self._skip_length_coded_string()
         self.table_name = self.read_length_coded_string().decode(encoding)
-        self.org_table = self.read_length_coded_string().decode(encoding)
+        self._org_table_at = self._skip_length_coded_string()
         self.name = self.read_length_coded_string().decode(encoding)
-        self.org_name = self.read_length_coded_string().decode(encoding)
+        self._org_name_at = self._skip_length_coded_string()
         (
             self.charsetnr,
             self.length,
             self.type_code,
             self.flags,
             self.scale,
-        ) = self.read_struct("<xHIBHBxx")
+        ) = _FIELD_DESCRIPTOR.unpack_from(self._data, self._position)
+        self._position += _FIELD_DESCRIPTOR.size
         # 'default' is a length coded binary and is still in the buffer?
         # not used for normal result sets...
 
+    def _skip_length_coded_string(self):
+        position = self._position
+        length = self.read_length_encoded_integer()
+        if length:
+            self.advance(length)
+        return position
+
+    def _string_at(self, position):
+        saved = self._position
+        self._position = position
+        try:
+            return self.read_length_coded_string()
+        finally:
+            self._position = saved
+
+    @property
+    def catalog(self):
+        return self._string_at(self._catalog_at)
+
+    @property
+    def db(self):
+        return self._string_at(self._db_at)
+
+    @property
+    def org_table(self):
+        return self._string_at(self._org_table_at).decode(self._encoding)
+
+    @property
+    def org_name(self):
+        return self._string_at(self._org_name_at).decode(self._encoding)
+
     def description(self):
         """Provides a 7-item tuple compatible with the Python PEP249 DB Spec."""
         return (
@@ -291,7 +352,7 @@ class OKPacketWrapper:
     """
 
     def __init__(self, from_packet):
-        if not from_packet.is_ok_packet():
+        if not (from_packet.is_ok_packet() or from_packet.is_ok_eof_packet()):
             raise ValueError(
                 "Cannot create "
                 + str(self.__class__.__name__)
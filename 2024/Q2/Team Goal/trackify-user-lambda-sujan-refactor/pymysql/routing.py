@@ -0,0 +1,255 @@
+"""
+Read/write splitting over a primary server and read replicas.
+"""
+
+from contextlib import contextmanager
+import re
+from time import monotonic, perf_counter
+
+from . import err
+from .connections import Connection
+from .constants import SERVER_STATUS
+from .cursors import Cursor
+
+
+#: Statements which may be sent to a replica.
+RE_READ_QUERY = re.compile(
+    r"\s*(?:/\*.*?\*/\s*)*\(?\s*SELECT\b", re.IGNORECASE | re.DOTALL
+)
+#: Reads which take locks or assign variables must run on the primary.
+RE_LOCKING_READ = re.compile(
+    r"\bFOR\s+(?:UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b|\bINTO\b",
+    re.IGNORECASE,
+)
+#: Reads of session state (user and system variables, the last insert id,
+#: named locks, ...), which is only right on the primary's connection.
+RE_SESSION_READ = re.compile(
+    r"@|\b(?:LAST_INSERT_ID|FOUND_ROWS|ROW_COUNT|CONNECTION_ID|GET_LOCK"
+    r"|RELEASE_LOCK|RELEASE_ALL_LOCKS|IS_USED_LOCK|IS_FREE_LOCK)\s*\(",
+    re.IGNORECASE,
+)
+#: Quoted strings and identifiers, removed before looking for RE_SESSION_READ.
+RE_QUOTED = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`", re.DOTALL)
+
+ROUND_ROBIN = "round_robin"
+LEAST_LATENCY = "least_latency"
+
+
+def is_read_query(sql):
+    """Return True if *sql* is a plain SELECT which is safe to run on a replica.
+
+    SELECTs taking locks, assigning or reading variables, or calling functions
+    of the session like ``LAST_INSERT_ID()`` are not.
+    """
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "surrogateescape")
+    if not RE_READ_QUERY.match(sql) or RE_LOCKING_READ.search(sql):
+        return False
+    return not RE_SESSION_READ.search(RE_QUOTED.sub("''", sql))
+
+
+class _Replica:
+    __slots__ = ("params", "conn", "latency", "down_until")
+
+    def __init__(self, params):
+        self.params = params
+        self.conn = None
+        self.latency = 0.0  # EWMA of query time in seconds
+        self.down_until = 0.0
+
+
+class RoutingConnection:
+    """
+    Connection-like object routing SELECTs to read replicas and all other
+    statements to the primary.
+
+    Cursors are created with :meth:`cursor` as usual. A query goes to the
+    primary when it is not a plain SELECT, while the primary has an open
+    transaction, and for ``sticky_seconds`` after a write (read-your-writes).
+    Use :meth:`read_only` to run several reads in one read-only transaction
+    on a replica.
+
+    :param primary: Connection arguments of the primary, e.g. ``{"host": "db"}``.
+    :param replicas: List of connection arguments of the replicas.
+        Replicas always use autocommit so they don't keep reading an old snapshot.
+    :param policy: ``"round_robin"`` or ``"least_latency"``. (default: round_robin)
+    :param sticky_seconds: Send reads to the primary for this long after a write.
+        (default: 0 - disabled)
+    :param retry_seconds: How long a replica which failed to connect is skipped.
+        (default: 30)
+    :param kwargs: Connection arguments shared by all servers (user, password, ...).
+
+    Like :class:`~pymysql.connections.Connection`, it must not be shared between threads.
+    """
+
+    def __init__(
+        self,
+        primary=None,
+        replicas=(),
+        *,
+        policy=ROUND_ROBIN,
+        sticky_seconds=0,
+        retry_seconds=30,
+        cursorclass=Cursor,
+        **kwargs,
+    ):
+        if policy not in (ROUND_ROBIN, LEAST_LATENCY):
+            raise ValueError(f"unknown replica policy {policy!r}")
+        self.policy = policy
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self.cursorclass = cursorclass
+        self._kwargs = kwargs
+        self._replicas = [_Replica(params) for params in replicas]
+        self._next_replica = 0
+        self._sticky_until = 0.0
+        self._pinned = None
+        self.primary = Connection(**{**kwargs, **(primary or {})})
+        self._current = self.primary
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        del exc_info
+        self.close()
+
+    def __getattr__(self, name):
+        # literal(), escape(), encoding, ... are taken from the primary.
+        if name == "primary":
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    @property
+    def _result(self):
+        return self._current._result
+
+    def cursor(self, cursor=None):
+        """Create a new cursor. See :meth:`Connection.cursor`."""
+        if cursor:
+            return cursor(self)
+        return self.cursorclass(self)
+
+    def _connect_replica(self, replica):
+        if replica.conn is None or not replica.conn.open:
+            params = {**self._kwargs, **replica.params, "autocommit": True}
+            replica.conn = Connection(**params)
+        return replica.conn
+
+    def _candidates(self):
+        now = monotonic()
+        replicas = [r for r in self._replicas if r.down_until <= now]
+        if self.policy == LEAST_LATENCY:
+            return sorted(replicas, key=lambda r: r.latency)
+        if replicas:
+            i = self._next_replica % len(replicas)
+            self._next_replica = i + 1
+            replicas = replicas[i:] + replicas[:i]
+        return replicas
+
+    def _pick_replica(self):
+        for replica in self._candidates():
+            try:
+                self._connect_replica(replica)
+            except err.OperationalError:
+                replica.down_until = monotonic() + self.retry_seconds
+                continue
+            return replica
+        return None
+
+    def _use_primary(self, sql):
+        if not self._replicas or not is_read_query(sql):
+            return True
+        if self.primary.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            return True
+        return monotonic() < self._sticky_until
+
+    def query(self, sql, unbuffered=False):
+        if self._pinned is not None:
+            replica = self._pinned
+        elif self._use_primary(sql):
+            replica = None
+        else:
+            replica = self._pick_replica()
+
+        if replica is None:
+            self._current = self.primary
+            rows = self.primary.query(sql, unbuffered=unbuffered)
+            if self.sticky_seconds and not is_read_query(sql):
+                self._sticky_until = monotonic() + self.sticky_seconds
+            return rows
+
+        self._current = conn = replica.conn
+        start = perf_counter()
+        try:
+            rows = conn.query(sql, unbuffered=unbuffered)
+        except err.OperationalError:
+            if not conn.open:
+                replica.down_until = monotonic() + self.retry_seconds
+            raise
+        replica.latency = replica.latency * 0.8 + (perf_counter() - start) * 0.2
+        return rows
+
+    def next_result(self, unbuffered=False):
+        return self._current.next_result(unbuffered=unbuffered)
+
+    def affected_rows(self):
+        return self._current.affected_rows()
+
+    def insert_id(self):
+        return self._current.insert_id()
+
+    @contextmanager
+    def read_only(self):
+        """Run the queries of the block in a read-only transaction on one replica.
+
+        Falls back to the primary when no replica is available.
+        """
+        if self._pinned is not None:
+            raise err.ProgrammingError("read_only() blocks can't be nested")
+        replica = self._pick_replica() if self._replicas else None
+        if replica is None:
+            yield self
+            return
+        conn = replica.conn
+        conn.query("START TRANSACTION READ ONLY")
+        self._pinned = replica
+        try:
+            yield self
+        except BaseException:
+            if conn.open:
+                conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            self._pinned = None
+            self._current = self.primary
+
+    def begin(self):
+        """Begin transaction on the primary."""
+        self._current = self.primary
+        self.primary.begin()
+
+    def commit(self):
+        self._current = self.primary
+        self.primary.commit()
+
+    def rollback(self):
+        self._current = self.primary
+        self.primary.rollback()
+
+    def ping(self, reconnect=True):
+        self.primary.ping(reconnect)
+
+    def close(self):
+        """Close the primary and all open replica connections."""
+        for replica in self._replicas:
+            if replica.conn is not None and replica.conn.open:
+                replica.conn.close()
+            replica.conn = None
+        self.primary.close()
+
+    @property
+    def open(self):
+        return self.primary.open
@@ -0,0 +1,111 @@
+"""
+Per-command instrumentation for Connection.
+
+Pass a callable as ``Connection(tracer=...)`` and it is called with a
+:class:`QueryTrace` once for every command sent to the server.
+When no tracer is set, nothing is recorded.
+"""
+
+import json
+
+from .constants import COMMAND
+
+
+class QueryTrace:
+    """Timings and counters of one command round trip.
+
+    Timestamps are ``time.perf_counter()`` values.
+    """
+
+    __slots__ = (
+        "command",
+        "sql",
+        "started",
+        "sent",
+        "first_byte",
+        "finished",
+        "decode_time",
+        "bytes_written",
+        "bytes_read",
+        "packets_written",
+        "packets_read",
+        "rows",
+        "error",
+    )
+
+    def __init__(self, command, sql, started):
+        self.command = command
+        self.sql = sql
+        self.started = started
+        self.sent = None
+        self.first_byte = None
+        self.finished = None
+        self.decode_time = 0.0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.packets_written = 0
+        self.packets_read = 0
+        self.rows = 0
+        #: Exception the command failed with, None if it succeeded.
+        self.error = None
+
+    def _ms(self, t):
+        if t is None:
+            return None
+        return round((t - self.started) * 1000, 3)
+
+    def as_dict(self, max_sql_length=None):
+        """Return the trace as a JSON serializable dict. Times are in ms."""
+        sql = self.sql
+        if isinstance(sql, (bytes, bytearray)):
+            sql = sql.decode("utf-8", "replace")
+        if max_sql_length is not None and len(sql) > max_sql_length:
+            sql = sql[:max_sql_length] + "..."
+        return {
+            "command": self.command,
+            "sql": sql,
+            "send_ms": self._ms(self.sent),
+            "first_byte_ms": self._ms(self.first_byte),
+            "decode_ms": round(self.decode_time * 1000, 3),
+            "total_ms": self._ms(self.finished or self.sent),
+            "bytes_written": self.bytes_written,
+            "bytes_read": self.bytes_read,
+            "packets_written": self.packets_written,
+            "packets_read": self.packets_read,
+            "rows": self.rows,
+            "error": None if self.error is None else repr(self.error),
+        }
+
+
+class LoggingTracer:
+    """Tracer writing each QueryTrace as one JSON log record.
+
+    :param logger: Logger to use. (default: ``logging.getLogger("pymysql.tracing")``)
+    :param level: Log level of the records. (default: logging.INFO)
+    :param max_sql_length: Truncate logged statements to this many characters.
+        Statements contain the escaped parameters. (default: 256)
+    :param commands: Command codes to log. (default: COM_QUERY only)
+    """
+
+    def __init__(
+        self,
+        logger=None,
+        level=None,
+        max_sql_length=256,
+        commands=(COMMAND.COM_QUERY,),
+    ):
+        import logging  # not imported by Connection unless tracing is used
+
+        self.logger = logger or logging.getLogger("pymysql.tracing")
+        self.level = logging.INFO if level is None else level
+        self.max_sql_length = max_sql_length
+        self.commands = commands
+
+    def __call__(self, trace):
+        if self.commands is not None and trace.command not in self.commands:
+            return
+        if not self.logger.isEnabledFor(self.level):
+            return
+        self.logger.log(
+            self.level, json.dumps(trace.as_dict(max_sql_length=self.max_sql_length))
+        )
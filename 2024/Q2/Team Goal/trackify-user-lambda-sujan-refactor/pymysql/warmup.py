@@ -0,0 +1,120 @@
+"""
+Open a connection ahead of time, e.g. during the AWS Lambda init phase.
+
+Lambda runs module level code with full CPU before the first request is
+billed, so connecting there (TCP, TLS and authentication) takes that work
+off the first invocation::
+
+    warmup = Warmup(budget=1.0, prefetch=["SELECT id, name FROM roles LIMIT 0"],
+                    host=..., user=..., password=...)
+
+    def handler(event, context):
+        conn = warmup.take() or pymysql.connect(...)
+"""
+
+import threading
+from time import monotonic
+
+from . import err
+from .connections import Connection
+
+
+class Warmup:
+    """Connect in a background thread and wait at most *budget* seconds for it.
+
+    If the connection isn't ready in time, importing the module isn't held up
+    any longer; the attempt goes on in the background and :meth:`take` waits
+    for what is left of the budget. When it fails or still isn't done,
+    :meth:`take` returns None and the caller connects lazily.
+
+    :param budget: Seconds to wait for the connection. (default: 1.0)
+    :param prefetch: Statements to run once connected, until the budget is
+        used up. Results are discarded.
+        Use ``SELECT ... LIMIT 0`` versions of the real queries to fill the
+        column metadata cache of the connection without reading any rows.
+    :param max_idle: :meth:`take` pings the connection (reconnecting if needed)
+        when it was opened more than this many seconds ago. (default: 60)
+    :param warmup_timeout: Read timeout (seconds) while warming up, so a stalled
+        handshake or prefetch query can't keep the thread busy. The
+        connection's own ``read_timeout`` is restored afterwards. (default: 5)
+    :param kwargs: Arguments for :class:`~pymysql.connections.Connection`.
+    """
+
+    def __init__(
+        self, budget=1.0, prefetch=(), max_idle=60, warmup_timeout=5, **kwargs
+    ):
+        self.budget = budget
+        self.prefetch = prefetch
+        self.max_idle = max_idle
+        self.warmup_timeout = warmup_timeout
+        self.kwargs = kwargs
+        #: Seconds taken by connecting and prefetching, None until finished.
+        self.elapsed = None
+        #: Exception raised while warming up, if any.
+        self.error = None
+        self._conn = None
+        self._finished = None
+        self._abandoned = False
+        self._lock = threading.Lock()
+        self._started = monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name="pymysql-warmup", daemon=True
+        )
+        self._thread.start()
+        self._thread.join(budget)
+
+    def _run(self):
+        start = self._started
+        read_timeout = self.kwargs.get("read_timeout")
+        conn = None
+        try:
+            conn = Connection(**{**self.kwargs, "read_timeout": self.warmup_timeout})
+            with conn.cursor() as cursor:
+                for sql in self.prefetch:
+                    # Only worth it while nobody waits for the connection.
+                    if monotonic() - start > self.budget:
+                        break
+                    cursor.execute(sql)
+            conn._read_timeout = read_timeout
+        except Exception as e:
+            self.error = e
+            if conn is not None:
+                conn.close()
+            conn = None
+        with self._lock:
+            if self._abandoned and conn is not None:
+                # take() gave up waiting; nobody will use it.
+                conn.close()
+                conn = None
+            self._finished = monotonic()
+            self.elapsed = self._finished - start
+            self._conn = conn
+
+    @property
+    def ready(self):
+        """True when the warm connection can be taken without waiting."""
+        return self._conn is not None and not self._thread.is_alive()
+
+    def take(self):
+        """Return the warm connection, or None if it isn't available.
+
+        The connection is handed out only once; the caller owns it afterwards.
+        If warming up is still running, waits for it until the budget (counted
+        from the start of warming up) is used up. Returns None when warming up
+        failed or didn't finish in time; a late connection is closed.
+        """
+        self._thread.join(max(self.budget - (monotonic() - self._started), 0))
+        with self._lock:
+            if self._finished is None:
+                self._abandoned = True
+                return None
+            conn, self._conn = self._conn, None
+        if conn is None:
+            return None
+        if monotonic() - self._finished > self.max_idle:
+            try:
+                conn.ping(reconnect=True)
+            except err.MySQLError:
+                conn.close()
+                return None
+        return conn
@@ -0,0 +1,27 @@
+import pytest
+
+import pymysql
+from pymysql.fakeserver import FakeServer
+
+
+def set_names(collation_id, **kwargs):
+    """Return the SET NAMES statements sent when connecting."""
+    with FakeServer(collation_id=collation_id) as server:
+        conn = pymysql.connect(**server.connect_args, **kwargs)
+        conn.close()
+    return [q for q in server.queries if q.startswith(b"SET NAMES")]
+
+
+@pytest.mark.parametrize("collation_id", [45, 224, 255])
+def test_set_names_without_collation(collation_id):
+    assert set_names(collation_id, charset="utf8mb4") == [b"SET NAMES utf8mb4"]
+
+
+def test_no_set_names_for_the_server_collation():
+    assert set_names(224, charset="utf8mb4", collation="utf8mb4_unicode_ci") == []
+
+
+def test_set_names_for_another_collation():
+    assert set_names(255, charset="utf8mb4", collation="utf8mb4_unicode_ci") == [
+        b"SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci"
+    ]
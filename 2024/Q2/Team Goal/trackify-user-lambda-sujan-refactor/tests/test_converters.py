@@ -0,0 +1,41 @@
+import datetime
+
+import pytest
+
+import pymysql
+from pymysql.constants import FIELD_TYPE
+from pymysql.fakeserver import FakeServer
+
+COLUMNS = [
+    ("active", FIELD_TYPE.TINY, 1),
+    ("level", FIELD_TYPE.TINY),
+    ("updated", FIELD_TYPE.DATETIME),
+]
+
+
+def fetch(values, **kwargs):
+    with FakeServer(COLUMNS, values=values) as server:
+        conn = pymysql.connect(**server.connect_args, **kwargs)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT active, level, updated FROM users")
+                return cursor.fetchone()
+        finally:
+            conn.close()
+
+
+@pytest.mark.parametrize("use_unicode", [True, False])
+@pytest.mark.parametrize("value, expected", [(b"0", False), (b"1", True)])
+def test_tinyint1_is_bool_with_json_fast(use_unicode, value, expected):
+    values = [value, b"0", b"2024-01-02 03:04:05"]
+    row = fetch(values, conv="json-fast", use_unicode=use_unicode)
+    assert row[0] is expected
+    assert row[1] == 0
+
+
+@pytest.mark.parametrize("use_unicode", [True, False])
+def test_json_datetime_matches_default(use_unicode):
+    values = [b"1", b"1", b"2024-01-02 03:04:05.123"]
+    default = fetch(values, use_unicode=use_unicode)
+    assert default[2] == datetime.datetime(2024, 1, 2, 3, 4, 5, 123000)
+    assert fetch(values, conv="json", use_unicode=use_unicode)[2] == str(default[2])
@@ -0,0 +1,72 @@
+import pytest
+
+import pymysql
+from pymysql import converters
+from pymysql.constants import FIELD_TYPE
+from pymysql.cursors import Cursor, SSCursor
+from pymysql.fakeserver import FakeServer
+
+
+@pytest.fixture
+def decoded():
+    """Server whose CALLs return sets of 1, 2 and 3 rows.
+
+    Yields a connect function and the list of the values decoded so far.
+    """
+    values = []
+
+    def decode(value):
+        values.append(value)
+        return int(value)
+
+    conv = {**converters.conversions, FIELD_TYPE.LONG: decode}
+    with FakeServer([("n", FIELD_TYPE.LONG)], values=[b"7"], call_sets=3) as server:
+        yield lambda: pymysql.connect(conv=conv, **server.connect_args), values
+
+
+def sets(conn, cursorclass, wanted=None):
+    with conn.cursor(cursorclass) as cursor:
+        cursor.execute("CALL report()")
+        result = [(i, tuple(rows)) for i, rows in cursor.iter_sets(wanted)]
+        cursor.execute("SELECT 1")
+        assert list(cursor.fetchall()) == [(7,)]
+    return result
+
+
+@pytest.mark.parametrize("cursorclass", [Cursor, SSCursor])
+def test_all_sets(decoded, cursorclass):
+    connect, values = decoded
+    conn = connect()
+    assert sets(conn, cursorclass) == [
+        (0, ((7,),)),
+        (1, ((7,), (7,))),
+        (2, ((7,), (7,), (7,))),
+        (3, ()),
+    ]
+    conn.close()
+
+
+def test_buffered_rows_are_tuples(decoded):
+    connect, values = decoded
+    conn = connect()
+    with conn.cursor() as cursor:
+        cursor.execute("CALL report()")
+        assert [type(rows) for _, rows in cursor.iter_sets()] == [tuple] * 4
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "cursorclass, decoded_rows",
+    [
+        # set 0 is read by execute() on a buffered cursor
+        (Cursor, 1 + 3),
+        (SSCursor, 3),
+    ],
+)
+def test_wanted_sets(decoded, cursorclass, decoded_rows):
+    connect, values = decoded
+    conn = connect()
+    assert sets(conn, cursorclass, wanted={2, 3}) == [(2, ((7,), (7,), (7,))), (3, ())]
+    # the values of SELECT 1
+    assert len(values) == decoded_rows + 1
+    conn.close()
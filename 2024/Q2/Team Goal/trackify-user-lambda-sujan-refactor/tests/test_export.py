@@ -0,0 +1,64 @@
+import datetime
+
+import pytest
+
+import pymysql
+from pymysql.constants import FIELD_TYPE
+from pymysql.export import export_query
+from pymysql.fakeserver import FakeServer
+
+pa = pytest.importorskip("pyarrow")
+
+COLUMNS = [
+    ("id", FIELD_TYPE.LONG),
+    ("born", FIELD_TYPE.DATE),
+    ("updated", FIELD_TYPE.DATETIME),
+]
+
+
+def read_table(path):
+    with pa.ipc.open_file(path) as reader:
+        return reader.read_all()
+
+
+@pytest.mark.parametrize("conv", ["default", "json"])
+def test_zero_dates_are_null(tmp_path, conv):
+    values = [b"1", b"0000-00-00", b"0000-00-00 00:00:00"]
+    with FakeServer(COLUMNS, rows=3, values=values) as server:
+        conn = pymysql.connect(conv=conv, **server.connect_args)
+        try:
+            rows = export_query(conn, "SELECT * FROM users", str(tmp_path / "a.arrow"))
+        finally:
+            conn.close()
+    assert rows == 3
+    table = read_table(tmp_path / "a.arrow")
+    assert table.column("id").to_pylist() == [1, 1, 1]
+    assert table.column("born").to_pylist() == [None, None, None]
+    assert table.column("updated").to_pylist() == [None, None, None]
+
+
+def test_valid_dates_are_kept(tmp_path):
+    values = [b"1", b"2024-01-02", b"2024-01-02 03:04:05"]
+    with FakeServer(COLUMNS, rows=1, values=values) as server:
+        conn = pymysql.connect(**server.connect_args)
+        try:
+            export_query(conn, "SELECT * FROM users", str(tmp_path / "a.arrow"))
+        finally:
+            conn.close()
+    table = read_table(tmp_path / "a.arrow")
+    assert table.column("born").to_pylist() == [datetime.date(2024, 1, 2)]
+    assert table.column("updated").to_pylist() == [
+        datetime.datetime(2024, 1, 2, 3, 4, 5)
+    ]
+
+
+def test_statement_without_result_set(tmp_path):
+    with FakeServer(COLUMNS) as server:
+        conn = pymysql.connect(**server.connect_args)
+        try:
+            with pytest.raises(pymysql.ProgrammingError, match="no result set"):
+                export_query(conn, "UPDATE users SET id = 1", str(tmp_path / "a.arrow"))
+            # the connection is still usable
+            conn.query("SELECT 1")
+        finally:
+            conn.close()
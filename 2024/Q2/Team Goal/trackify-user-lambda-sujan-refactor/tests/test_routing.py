@@ -0,0 +1,63 @@
+import pytest
+
+from pymysql.fakeserver import FakeServer
+from pymysql.routing import RoutingConnection, is_read_query
+
+
+@pytest.fixture
+def servers():
+    with FakeServer() as primary, FakeServer() as replica:
+        yield primary, replica
+
+
+def route(servers, sql):
+    """Return "primary" or "replica", the server *sql* was sent to."""
+    primary, replica = servers
+    conn = RoutingConnection(primary.connect_args, [replica.connect_args])
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql)
+    finally:
+        conn.close()
+    if sql.encode() in primary.queries:
+        return "primary"
+    assert sql.encode() in replica.queries
+    return "replica"
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT id FROM users",
+        "/* list */ SELECT id FROM users WHERE email = 'a@example.com'",
+        "SELECT id FROM users WHERE note = 'FOUND_ROWS()'",
+    ],
+)
+def test_plain_select_goes_to_a_replica(servers, sql):
+    assert route(servers, sql) == "replica"
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "INSERT INTO users (name) VALUES ('a')",
+        "SELECT id FROM users FOR UPDATE",
+        "SELECT LAST_INSERT_ID()",
+        "SELECT last_insert_id ()",
+        "SELECT @x",
+        "SELECT @@session.sql_mode",
+        "SELECT FOUND_ROWS()",
+        "SELECT ROW_COUNT()",
+        "SELECT GET_LOCK('job', 10)",
+        "SELECT RELEASE_LOCK('job')",
+        "SELECT IS_USED_LOCK('job')",
+        "SELECT CONNECTION_ID()",
+    ],
+)
+def test_session_dependent_query_goes_to_the_primary(servers, sql):
+    assert route(servers, sql) == "primary"
+
+
+def test_is_read_query_accepts_bytes():
+    assert is_read_query(b"SELECT 1")
+    assert not is_read_query(b"SELECT @x")
@@ -0,0 +1,57 @@
+import socket
+
+import pytest
+
+import pymysql
+from pymysql.fakeserver import FakeServer
+
+
+def connect(server, traces):
+    return pymysql.connect(tracer=traces.append, **server.connect_args)
+
+
+def test_query_is_traced():
+    traces = []
+    with FakeServer(rows=3) as server:
+        conn = connect(server, traces)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.close()
+    trace = [t for t in traces if t.sql == b"SELECT 1"][0]
+    assert trace.rows == 3
+    assert trace.error is None
+    assert trace.as_dict()["error"] is None
+
+
+def test_failed_query_is_traced_with_the_error():
+    traces = []
+    with FakeServer(errors=[b"SELEKT"]) as server:
+        conn = connect(server, traces)
+        with pytest.raises(pymysql.ProgrammingError):
+            conn.query("SELEKT 1")
+        assert conn._trace is None
+        conn.query("SELECT 1")
+        conn.close()
+    failed, ok = [t for t in traces if t.sql in (b"SELEKT 1", b"SELECT 1")]
+    assert isinstance(failed.error, pymysql.ProgrammingError)
+    assert "ProgrammingError" in failed.as_dict()["error"]
+    assert ok.error is None
+
+
+def test_lost_connection_finishes_the_trace():
+    traces = []
+    with FakeServer() as server:
+        conn = connect(server, traces)
+        conn._sock.shutdown(socket.SHUT_RDWR)
+        with pytest.raises(pymysql.OperationalError):
+            conn.query("SELECT 1")
+        assert conn._trace is None
+        failed = traces[-1]
+        assert isinstance(failed.error, pymysql.OperationalError)
+        bytes_read = failed.bytes_read
+
+        # The handshake of the new connection isn't counted into the old trace.
+        conn.ping(reconnect=True)
+        assert failed.bytes_read == bytes_read
+        assert traces[-1] is not failed and traces[-1].error is None
+        conn.close()